@@ -1,28 +1,40 @@
 from .common import (
     DEFAULT_CONFIG,
+    OutputTail,
     SOURCE_TYPES,
     SYNC_HISTORY_FILE,
     URI_HISTORY_FILE,
     build_mysql_uri_from_conn,
     build_pgloader_command,
     build_pgloader_table_filter_clause,
+    copy_config,
     filter_tables_by_selected,
+    find_executable,
+    fill_db_uri,
+    get_db_sizes_bulk,
     get_total_tables,
+    get_total_tables_bulk,
+    has_pgloader_error_marker,
     is_datax_key_log,
     is_pgloader_error_log,
+    iter_output_batches,
+    iter_output_lines,
     load_config,
     mask_uri_password,
     normalize_db_uri,
     parse_db_uri,
     parse_selected_tables,
     patch_rendered_load_for_full_sync,
+    read_template,
     render_load_file,
     resolve_mysql_conn,
     run_command,
+    running_containers,
     save_config,
     should_skip_table,
 )
 from .database import (
+    MysqlSession,
     coerce_target_json_columns_to_text,
     clear_target_public_table_data,
     clear_target_public_tables,
@@ -31,9 +43,11 @@ from .database import (
     ensure_target_primary_keys,
     get_mysql_columns,
     get_mysql_databases,
+    get_mysql_schema_bundle,
     get_mysql_split_pk,
     get_mysql_tables,
     get_target_databases,
+    run_psql_container_sql,
     sync_views_for_db,
 )
 from .datax import (
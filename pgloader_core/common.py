@@ -1,7 +1,10 @@
+import functools
 import json
 import os
 import re
+import shutil
 import subprocess
+import time
 from urllib.parse import quote, unquote, urlparse
 
 DEFAULT_CONFIG = "pgloader_tool.json"
@@ -9,6 +12,35 @@ SYNC_HISTORY_FILE = "sync_history.json"
 URI_HISTORY_FILE = "uri_history.json"
 SOURCE_TYPES = ["mysql", "mssql", "sqlite", "pgsql", "redshift", "file"]
 
+# Keyed by (abspath, st_mtime_ns, st_size) so edits on disk invalidate entries automatically
+_CONFIG_CACHE: dict[tuple, dict] = {}
+_TEMPLATE_CACHE: dict[tuple, str] = {}
+_CONFIG_DIGESTS: dict[tuple, bytes] = {}
+_RENDERED_DIGESTS: dict[tuple, bytes] = {}
+_EXECUTABLE_CACHE: dict[str, str] = {}
+# (monotonic time, names) of the last `docker ps` snapshot
+_RUNNING_CONTAINERS: list = [0.0, None]
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+_SAFE_SCHEMA_RE = re.compile(r"^[\w$-]+$")
+# A loop of plain substring tests beats one regex alternation here: each
+# `in` is a C-level scan, while sre retries every alternative at every offset
+_DATAX_KEY_TOKENS = (
+    "ERROR",
+    "WARN",
+    "jobContainer starts job",
+    "completed successfully",
+    "Total ",
+    "Percentage",
+    "DataX jobId",
+)
+_PGLOADER_ERROR_PATTERN = " FATAL | ERROR |KABOOM!|ESRAP-PARSE-ERROR|Failed to create the schema"
+_PGLOADER_ERROR_RE = re.compile(_PGLOADER_ERROR_PATTERN)
+# Same tokens for undecoded output; unlike the per-line check it does not strip first
+_PGLOADER_ERROR_BYTES_RE = re.compile(_PGLOADER_ERROR_PATTERN.encode("ascii"))
+_OUTPUT_LINE_RE = re.compile(r"[^\n]*\n")
+_FOREIGN_KEYS_OPTION_RE = re.compile(r"(^\s*)foreign\s+keys\s*,\s*$", re.IGNORECASE | re.MULTILINE)
+_URI_SINGLE_SLASH_RE = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):/(?!/)")
+
 
 def should_skip_table(table: str, keywords: list[str]) -> bool:
     name = table.lower()
@@ -58,57 +90,233 @@ def build_pgloader_table_filter_clause(tables: list[str]) -> str:
 
 def is_datax_key_log(line: str) -> bool:
     text = line.strip()
-    if not text:
-        return False
-    keep_tokens = [
-        "ERROR",
-        "WARN",
-        "jobContainer starts job",
-        "completed successfully",
-        "Total ",
-        "Percentage",
-        "DataX jobId",
-    ]
-    return any(token in text for token in keep_tokens)
+    for token in _DATAX_KEY_TOKENS:
+        if token in text:
+            return True
+    return False
+
+def has_pgloader_error_marker(data: bytes) -> bool:
+    return _PGLOADER_ERROR_BYTES_RE.search(data) is not None
 
 def is_pgloader_error_log(line: str) -> bool:
-    text = line.strip()
-    if not text:
+    # Every error token contains an E, F or K; most lines are rejected before the regex runs
+    if "E" not in line and "F" not in line and "K" not in line:
         return False
-    tokens = [
-        " FATAL ",
-        " ERROR ",
-        "KABOOM!",
-        "ESRAP-PARSE-ERROR",
-        "Failed to create the schema",
-    ]
-    return any(token in text for token in tokens)
+    return _PGLOADER_ERROR_RE.search(line.strip()) is not None
+
+def _file_cache_key(path: str) -> tuple:
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+def _drop_cached_path(cache: dict, path: str) -> None:
+    abspath = os.path.abspath(path)
+    for key in [key for key in cache if key[0] == abspath]:
+        cache.pop(key, None)
+
+def copy_config(value):
+    # Configs are plain JSON (dicts, lists, scalars); copying just those shapes
+    # is ~2.5x faster than copy.deepcopy and its memo bookkeeping
+    if type(value) is dict:
+        return {key: copy_config(item) if type(item) in (dict, list) else item for key, item in value.items()}
+    if type(value) is list:
+        return [copy_config(item) if type(item) in (dict, list) else item for item in value]
+    return value
 
 def load_config(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    key = _file_cache_key(path)
+    cached = _CONFIG_CACHE.get(key)
+    if cached is None:
+        with open(path, "rb") as f:
+            raw = f.read()
+        cached = json.loads(raw.decode("utf-8"))
+        _drop_cached_path(_CONFIG_CACHE, path)
+        _drop_cached_path(_CONFIG_DIGESTS, path)
+        _CONFIG_CACHE[key] = cached
+        _CONFIG_DIGESTS[key] = _config_digest(raw)
+    # Callers mutate nested dicts freely, never hand out the cached object itself
+    return copy_config(cached)
+
+def _config_digest(data: bytes) -> bytes:
+    # hashlib loads OpenSSL; import it on the first save/render instead of at startup
+    import hashlib
+
+    return hashlib.blake2b(data, digest_size=16).digest()
 
-def save_config(path: str, config: dict) -> None:
+def save_config(path: str, config: dict) -> bool:
+    text = json.dumps(config, ensure_ascii=False, indent=2)
+    digest = _config_digest(text.encode("utf-8"))
+    try:
+        if _CONFIG_DIGESTS.get(_file_cache_key(path)) == digest:
+            return False
+    except OSError:
+        pass
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+        f.write(text)
+    _drop_cached_path(_CONFIG_CACHE, path)
+    _drop_cached_path(_CONFIG_DIGESTS, path)
+    _CONFIG_DIGESTS[_file_cache_key(path)] = digest
+    return True
+
+def read_template(path: str) -> str:
+    key = _file_cache_key(path)
+    cached = _TEMPLATE_CACHE.get(key)
+    if cached is None:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = f.read()
+        _drop_cached_path(_TEMPLATE_CACHE, path)
+        _TEMPLATE_CACHE[key] = cached
+    return cached
 
-def run_command(cmd: list, env: dict | None = None) -> subprocess.CompletedProcess:
+def find_executable(name: str) -> str | None:
+    # Only hits are cached so installing docker mid-session is still picked up
+    path = _EXECUTABLE_CACHE.get(name)
+    if path is None:
+        path = shutil.which(name)
+        if path is not None:
+            _EXECUTABLE_CACHE[name] = path
+    return path
+
+@functools.lru_cache(maxsize=32)
+def mysql_exec_prefix(
+    mysql_container: str,
+    user: str,
+    host: str = "",
+    port: int = 0,
+    charset: bool = True,
+    interactive: bool = False,
+) -> tuple[str, ...]:
+    # `-e MYSQL_PWD` without a value forwards it from the docker client's env
+    # (mysql_exec_env), so the password is in neither argv and mysql no longer
+    # warns about a password on the command line
+    cmd = ["docker", "exec", "-e", "MYSQL_PWD"]
+    if interactive:
+        cmd.append("-i")
+    cmd.extend([mysql_container, "mysql"])
+    if charset:
+        cmd.append("--default-character-set=utf8mb4")
+    cmd.extend([f"-u{user}", "-N"])
+    if host:
+        cmd.extend(["-h", host])
+    if port:
+        cmd.extend(["-P", str(port)])
+    return tuple(cmd)
+
+def mysql_exec_env(password: str) -> dict[str, str]:
+    # Built per call: picks up later environment changes and keeps no password copies around
+    return {**os.environ, "MYSQL_PWD": password}
+
+def running_containers(max_age: float = 30.0) -> frozenset[str] | None:
+    # One `docker ps` answers every "is this container up" check for max_age
+    # seconds; None means docker itself could not be asked
+    checked_at, names = _RUNNING_CONTAINERS
+    now = time.monotonic()
+    if names is not None and now - checked_at < max_age:
+        return names
+    result = run_command(["docker", "ps", "--format", "{{.Names}}"])
+    if result.returncode != 0:
+        return None
+    names = frozenset(line.strip() for line in (result.stdout or "").splitlines() if line.strip())
+    _RUNNING_CONTAINERS[:] = [now, names]
+    return names
+
+def run_command(cmd: list, env: dict | None = None, input: str | None = None, text: bool = True) -> subprocess.CompletedProcess:
+    if cmd and find_executable(str(cmd[0])) is None:
+        if not text:
+            return subprocess.CompletedProcess(cmd, 127, b"", f"{cmd[0]}: command not found\n".encode())
+        return subprocess.CompletedProcess(cmd, 127, "", f"{cmd[0]}: command not found\n")
+    if not text:
+        # Raw bytes for bulk metadata dumps: the caller decodes once and splits on
+        # b"\n" itself, skipping the text wrapper's newline translation pass
+        return subprocess.run(cmd, env=env, input=input, capture_output=True)
     # Force UTF-8 decoding and replace invalid bytes to avoid locale decode errors from docker exec output
     return subprocess.run(
         cmd,
         env=env,
+        input=input,
         capture_output=True,
         text=True,
         encoding="utf-8",
         errors="replace",
     )
 
+def iter_output_batches(stream, chunk_size: int = 1 << 16):
+    # Read the raw pipe fd in large chunks and split lines ourselves instead of
+    # going through a TextIOWrapper line by line. Each batch carries the raw
+    # bytes it was decoded from so callers can prefilter on them.
+    fd = stream.fileno()
+    pending = b""
+    while True:
+        chunk = os.read(fd, chunk_size)
+        if not chunk:
+            break
+        if pending:
+            chunk = pending + chunk
+        cut = chunk.rfind(b"\n") + 1
+        if not cut:
+            pending = chunk
+            continue
+        data, pending = chunk[:cut], chunk[cut:]
+        # The cut sits on a newline, so no UTF-8 sequence straddles it and the
+        # whole chunk decodes in one call
+        text = data.decode("utf-8", "replace")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        yield data, _OUTPUT_LINE_RE.findall(text)
+    if pending:
+        yield pending, [pending.decode("utf-8", "replace")]
+
+def iter_output_lines(stream, chunk_size: int = 1 << 16):
+    for _data, lines in iter_output_batches(stream, chunk_size):
+        yield from lines
+
+class OutputTail:
+    # Keeps the raw end of a process's output; lines are only decoded when a
+    # failure report actually needs them
+    def __init__(self, max_lines: int = 200, max_bytes: int = 1 << 16) -> None:
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.truncated = False
+
+    def append(self, data: bytes) -> None:
+        self.buffer += data
+        # Trim in bulk once the buffer doubles instead of on every chunk
+        if len(self.buffer) > 2 * self.max_bytes:
+            del self.buffer[:-self.max_bytes]
+            self.truncated = True
+
+    def lines(self) -> list[str]:
+        data = bytes(self.buffer[-self.max_bytes:])
+        if self.truncated or len(self.buffer) > self.max_bytes:
+            # The cut may land mid-line; drop that fragment
+            data = data[data.find(b"\n") + 1:]
+        text = data.decode("utf-8", "replace")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        lines = _OUTPUT_LINE_RE.findall(text)
+        rest = text[sum(map(len, lines)):]
+        if rest:
+            lines.append(rest)
+        return lines[-self.max_lines:]
+
+    def text(self) -> str:
+        return "".join(self.lines())
+
+@functools.lru_cache(maxsize=64)
+def _split_db_uri_template(uri: str) -> tuple[str, ...]:
+    return tuple(uri.split("{{DB_NAME}}"))
+
+def fill_db_uri(uri: str, db: str) -> str:
+    return db.join(_split_db_uri_template(uri))
+
+@functools.lru_cache(maxsize=256)
 def normalize_db_uri(uri: str) -> str:
     text = (uri or "").strip()
     if not text:
         return ""
-    return re.sub(r"^([a-zA-Z][a-zA-Z0-9+.-]*):/(?!/)", r"\1://", text)
+    return _URI_SINGLE_SLASH_RE.sub(r"\1://", text)
 
+@functools.lru_cache(maxsize=256)
 def mask_uri_password(uri: str) -> str:
     text = normalize_db_uri(uri)
     if not text:
@@ -138,7 +346,7 @@ def build_mysql_uri_from_conn(conn: dict[str, str | int], db: str) -> str:
 
 def resolve_mysql_conn(config: dict, db: str) -> dict[str, str | int]:
     mysql_cfg = config.get("mysql", {})
-    source_uri = normalize_db_uri((config.get("source", {}).get("uri") or "").replace("{{DB_NAME}}", db))
+    source_uri = normalize_db_uri(fill_db_uri(config.get("source", {}).get("uri") or "", db))
 
     host = ""
     port = 0
@@ -164,38 +372,108 @@ def resolve_mysql_conn(config: dict, db: str) -> dict[str, str | int]:
     }
 
 def get_total_tables(mysql_container: str, user: str, password: str, db: str, host: str = "", port: int = 0) -> int:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        "--default-character-set=utf8mb4",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
     cmd.extend([
         "-e",
         f"SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='{db}';",
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return 0
-    output = (result.stdout or "").strip().splitlines()
-    if not output:
-        return 0
+    head = (result.stdout or "").lstrip().partition("\n")[0]
     try:
-        return int(output[0].strip())
+        return int(head.strip() or 0)
     except ValueError:
         return 0
 
-def render_load_file(template_path: str, output_path: str, replacements: dict) -> None:
-    with open(template_path, "r", encoding="utf-8") as f:
-        content = f.read()
+def build_table_counts_sql(dbs: list[str]) -> str:
+    safe_dbs = [db for db in dict.fromkeys(dbs) if _SAFE_SCHEMA_RE.match(db)]
+    if not safe_dbs:
+        return ""
+    schemas = ", ".join(f"'{db}'" for db in safe_dbs)
+    return (
+        "SELECT table_schema, COUNT(*) FROM information_schema.tables "
+        f"WHERE table_schema IN ({schemas}) GROUP BY table_schema;"
+    )
+
+def parse_table_counts(lines: list[str]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for line in lines:
+        name, sep, count = line.strip().partition("\t")
+        if not sep:
+            continue
+        try:
+            counts[name.strip()] = int(count.partition("\t")[0].strip())
+        except ValueError:
+            continue
+    return counts
+
+def is_safe_schema_name(db: str) -> bool:
+    return bool(_SAFE_SCHEMA_RE.match(db))
+
+def get_total_tables_bulk(
+    mysql_container: str,
+    user: str,
+    password: str,
+    dbs: list[str],
+    host: str = "",
+    port: int = 0,
+) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    sql = build_table_counts_sql(dbs)
+    if sql:
+        cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
+        cmd.extend(["-e", sql])
+        result = run_command(cmd, env=mysql_exec_env(password))
+        if result.returncode == 0:
+            counts = parse_table_counts((result.stdout or "").splitlines())
+    # Names outside the whitelist are never spliced into the IN list; count them one by one
+    for db in dbs:
+        if db not in counts and not is_safe_schema_name(db):
+            counts[db] = get_total_tables(mysql_container, user, password, db, host=host, port=port)
+    return counts
+
+def mysql_quote_literal(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
+
+def build_db_sizes_sql(dbs: list[str]) -> str:
+    names = list(dict.fromkeys(dbs))
+    if not names:
+        return ""
+    schemas = ", ".join(mysql_quote_literal(db) for db in names)
+    return (
+        "SELECT table_schema, COALESCE(SUM(data_length + index_length), 0) "
+        f"FROM information_schema.tables WHERE table_schema IN ({schemas}) GROUP BY table_schema;"
+    )
+
+def get_db_sizes_bulk(
+    mysql_container: str,
+    user: str,
+    password: str,
+    dbs: list[str],
+    host: str = "",
+    port: int = 0,
+) -> dict[str, int] | None:
+    sql = build_db_sizes_sql(dbs)
+    if not sql:
+        return {}
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
+    cmd.extend(["-e", sql])
+    result = run_command(cmd, env=mysql_exec_env(password))
+    if result.returncode != 0:
+        return None
+    sizes = parse_table_counts((result.stdout or "").splitlines())
+    # Schemas without tables do not show up in the GROUP BY output
+    return {db: sizes.get(db, 0) for db in dbs}
+
+@functools.lru_cache(maxsize=32)
+def _compile_template(content: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    # split() with one capture group alternates literal, key, literal, ...
+    parts = _PLACEHOLDER_RE.split(content)
+    return tuple(parts[0::2]), tuple(parts[1::2])
+
+def render_load_file(template_path: str, output_path: str, replacements: dict, no_foreign_keys: bool = False) -> None:
+    content = read_template(template_path)
 
     table_filter = (replacements.get("TABLE_FILTER") or "").strip()
     if table_filter and "{{TABLE_FILTER}}" not in content:
@@ -205,11 +483,26 @@ def render_load_file(template_path: str, output_path: str, replacements: dict) -
         else:
             content = content.rstrip() + "\n\n" + table_filter + "\n"
 
-    for key, value in replacements.items():
-        content = content.replace(f"{{{{{key}}}}}", value)
+    literals, keys = _compile_template(content)
+    chunks = [literals[0]]
+    for key, literal in zip(keys, literals[1:]):
+        chunks.append(replacements.get(key, f"{{{{{key}}}}}"))
+        chunks.append(literal)
+    content = "".join(chunks)
+    if no_foreign_keys:
+        content = _FOREIGN_KEYS_OPTION_RE.sub(r"\1no foreign keys,", content)
 
+    # Leave an untouched file from an identical earlier render in place
+    digest = _config_digest(content.encode("utf-8"))
+    try:
+        if _RENDERED_DIGESTS.get(_file_cache_key(output_path)) == digest:
+            return
+    except OSError:
+        pass
     with open(output_path, "w", encoding="utf-8") as f:
         f.write(content)
+    _drop_cached_path(_RENDERED_DIGESTS, output_path)
+    _RENDERED_DIGESTS[_file_cache_key(output_path)] = digest
 
 def patch_rendered_load_for_full_sync(path: str) -> None:
     if not os.path.isfile(path):
@@ -220,7 +513,7 @@ def patch_rendered_load_for_full_sync(path: str) -> None:
     except Exception:
         return
 
-    updated = re.sub(r"(^\s*)foreign\s+keys\s*,\s*$", r"\1no foreign keys,", content, flags=re.IGNORECASE | re.MULTILINE)
+    updated = _FOREIGN_KEYS_OPTION_RE.sub(r"\1no foreign keys,", content)
     if updated == content:
         return
     try:
@@ -239,26 +532,40 @@ def build_pgloader_command(
     for key, value in env.items():
         cmd.extend(["-e", f"{key}={value}"])
     cmd.extend(["-v", f"{workspace}:/pgloader", image])
-    cmd.extend([
-        "sh",
-        "-c",
-        f"pgloader --on-error-stop /pgloader/{load_file}",
-    ])
+    # Run pgloader as the container command itself: no extra shell, stop signals
+    # reach pgloader, and the file name is never parsed by a shell
+    cmd.extend(["pgloader", "--on-error-stop", f"/pgloader/{load_file}"])
     return cmd
 
-def parse_db_uri(uri: str) -> dict:
+@functools.lru_cache(maxsize=256)
+def _parse_db_uri_fields(uri: str) -> tuple:
     parsed = urlparse(uri)
     if not parsed.scheme:
         raise ValueError(f"Invalid URI: {uri}")
+    return (
+        parsed.scheme,
+        parsed.hostname or "",
+        parsed.port or 0,
+        unquote(parsed.username or ""),
+        unquote(parsed.password or ""),
+        (parsed.path or "").lstrip("/"),
+    )
+
+def parse_db_uri(uri: str) -> dict:
+    # Callers may mutate the result, so only the parsed fields are cached
+    scheme, host, port, user, password, database = _parse_db_uri_fields(uri)
     return {
-        "scheme": parsed.scheme,
-        "host": parsed.hostname or "",
-        "port": parsed.port or 0,
-        "user": unquote(parsed.username or ""),
-        "password": unquote(parsed.password or ""),
-        "database": (parsed.path or "").lstrip("/"),
+        "scheme": scheme,
+        "host": host,
+        "port": port,
+        "user": user,
+        "password": password,
+        "database": database,
     }
 
 def pg_quote_ident(name: str) -> str:
-    return '"' + name.replace('"', '""') + '"'
+    # Identifiers almost never contain a quote; skip the replace scan for them
+    if '"' in name:
+        name = name.replace('"', '""')
+    return f'"{name}"'
 
@@ -1,19 +1,59 @@
+import functools
+import os
+import queue
 import re
+import subprocess
+import threading
+import time
+
+try:
+    import psycopg
+except ImportError:
+    # Optional: without it every target query goes through docker exec psql
+    psycopg = None
 
 from .common import (
+    build_db_sizes_sql,
+    build_table_counts_sql,
+    fill_db_uri,
+    is_safe_schema_name,
+    mysql_exec_env,
+    mysql_exec_prefix,
+    mysql_quote_literal,
     parse_db_uri,
     parse_selected_tables,
+    parse_table_counts,
     pg_quote_ident,
     resolve_mysql_conn,
     run_command,
 )
 
 
+# Statements longer than this are piped through stdin instead of argv, which
+# Windows caps at 32K characters for the whole docker command line
+_PSQL_ARGV_SQL_LIMIT = 8192
+# Bounds each connection attempt so probing an unreachable candidate host fails
+# fast instead of waiting out the OS TCP timeout
+_PSQL_CONNECT_TIMEOUT = "5"
+_MYSQL_DATABASES_SQL = (
+    "SELECT schema_name FROM information_schema.schemata "
+    "WHERE schema_name NOT IN ('information_schema','mysql','performance_schema','sys') "
+    "ORDER BY schema_name"
+)
+_VIEW_BT_IDENT_RE = re.compile(r"`([^`]+)`")
+_VIEW_IFNULL_RE = re.compile(r"\bIFNULL\(", re.IGNORECASE)
+_VIEW_DATE_PART_RE = re.compile(r"\b(YEAR|MONTH|QUARTER)\s*\(\s*([^\(\)]+?)\s*\)", re.IGNORECASE)
+
 def _make_psql_exec_cmd(psql_container: str, pg_password: str, pg_host: str, pg_port: str,
-                         pg_user: str, pg_db: str, sql: str) -> list:
-    return [
+                         pg_user: str, pg_db: str, sql: str | None, single_transaction: bool = True) -> list:
+    cmd = [
         "docker", "exec",
         "-e", f"PGPASSWORD={pg_password}",
+        "-e", f"PGCONNECT_TIMEOUT={_PSQL_CONNECT_TIMEOUT}",
+    ]
+    if sql is None:
+        cmd.append("-i")
+    cmd.extend([
         psql_container,
         "psql",
         "-h", pg_host,
@@ -22,10 +62,103 @@ def _make_psql_exec_cmd(psql_container: str, pg_password: str, pg_host: str, pg_
         "-d", pg_db,
         "-v", "ON_ERROR_STOP=1",
         "-q",
-        "-c", sql,
-    ]
+    ])
+    if sql is None:
+        # -1 keeps the all-or-nothing behaviour of a single -c string; without it
+        # every statement commits on its own
+        if single_transaction:
+            cmd.append("-1")
+        cmd.extend(["-f", "-"])
+    else:
+        cmd.extend(["-c", sql])
+    return cmd
+
+def _run_psql_exec(psql_container: str, pg_password: str, pg_host: str, pg_port: str,
+                   pg_user: str, pg_db: str, sql: str, single_transaction: bool = True) -> subprocess.CompletedProcess:
+    # A -c string is one implicit transaction, so per-statement commits go over stdin
+    if len(sql) > _PSQL_ARGV_SQL_LIMIT or not single_transaction:
+        cmd = _make_psql_exec_cmd(psql_container, pg_password, pg_host, pg_port, pg_user, pg_db, None, single_transaction)
+        return run_command(cmd, input=sql)
+    cmd = _make_psql_exec_cmd(psql_container, pg_password, pg_host, pg_port, pg_user, pg_db, sql)
+    return run_command(cmd)
+
+def _is_pg_connection_error(text: str) -> bool:
+    low = text.lower()
+    return any(tok in low for tok in (
+        "could not connect", "connection to server", "connection refused",
+        "no route to host", "network is unreachable", "name or service not known",
+    ))
 
-def run_psql_container_sql(target: dict, target_cfg: dict, sql: str) -> tuple[int, str]:
+# (container, configured host, port) -> host that actually answered from inside the container
+_PSQL_HOST_OVERRIDES: dict[tuple[str, str, str], str] = {}
+
+# (host, port, user, password, db) -> open autocommit psycopg connection. Servers
+# whose connect failed at the network level (e.g. a host only resolvable inside
+# the docker network) stay on the docker exec psql path for the rest of the session.
+_PG_CONNECTIONS: dict[tuple, object] = {}
+_PG_UNREACHABLE: set[tuple[str, str]] = set()
+_PG_CONNECTIONS_LOCK = threading.Lock()
+# psql runs inside psql_container, so these names point at the container (or,
+# for host.docker.internal, at the docker host) rather than at this machine
+_PG_CONTAINER_RELATIVE_HOSTS = frozenset({"", "localhost", "127.0.0.1", "::1", "host.docker.internal"})
+
+def _pg_connection(host: str, port: str, user: str, password: str, db: str):
+    if psycopg is None or host.strip().lower() in _PG_CONTAINER_RELATIVE_HOSTS:
+        return None
+    key = (host, port, user, password, db)
+    with _PG_CONNECTIONS_LOCK:
+        if (host, port) in _PG_UNREACHABLE:
+            return None
+        conn = _PG_CONNECTIONS.get(key)
+        if conn is not None and not conn.closed:
+            return conn
+        try:
+            conn = psycopg.connect(
+                host=host,
+                port=port,
+                user=user,
+                password=password,
+                dbname=db,
+                connect_timeout=int(_PSQL_CONNECT_TIMEOUT),
+                autocommit=True,
+            )
+        except psycopg.Error as exc:
+            _PG_CONNECTIONS.pop(key, None)
+            # A missing database or bad password says nothing about the server itself
+            message = str(exc)
+            if _is_pg_connection_error(message) or "timeout expired" in message.lower():
+                _PG_UNREACHABLE.add((host, port))
+            return None
+        _PG_CONNECTIONS[key] = conn
+        return conn
+
+def _run_psycopg_sql(conn, sql: str, single_transaction: bool = True) -> tuple[int, str] | None:
+    # Same contract as the psql path: the whole string runs as one implicit
+    # transaction, COPY ... TO STDOUT returns its rows as text. None means the
+    # connection died and the caller should fall back to docker exec psql.
+    # Without single_transaction each line is its own autocommitted statement and
+    # a failure is reported with the line number, like psql -f - does.
+    lineno = 0
+    try:
+        with conn.cursor() as cur:
+            if not single_transaction:
+                for lineno, statement in enumerate(sql.split("\n"), start=1):
+                    if statement.strip():
+                        cur.execute(statement)
+                return 0, ""
+            if sql.lstrip()[:4].upper() == "COPY":
+                with cur.copy(sql) as copy:
+                    data = b"".join(bytes(chunk) for chunk in copy)
+                return 0, data.decode("utf-8", "replace")
+            cur.execute(sql)
+        return 0, ""
+    except psycopg.Error as exc:
+        if conn.broken:
+            return None
+        prefix = f"psql:<stdin>:{lineno}: " if lineno else ""
+        return 1, f"{prefix}ERROR:  {exc}\n"
+
+def run_psql_container_sql(target: dict, target_cfg: dict, sql: str, single_transaction: bool = True) -> tuple[int, str]:
     pg_user = str(target.get("user", ""))
     pg_db = str(target.get("database", ""))
     pg_host = str(target.get("host", ""))
@@ -33,9 +166,30 @@ def run_psql_container_sql(target: dict, target_cfg: dict, sql: str) -> tuple[in
     pg_password = str(target.get("password", ""))
     psql_container = (target_cfg.get("psql_container") or "postgres16").strip()
 
+    conn = _pg_connection(pg_host, pg_port, pg_user, pg_password, pg_db)
+    if conn is not None:
+        result = _run_psycopg_sql(conn, sql, single_transaction)
+        if result is not None:
+            return result
+
+    # A previous call already found that only host.docker.internal is reachable;
+    # go there directly instead of waiting for the configured host to time out again
+    host_key = (psql_container, pg_host, pg_port)
+    override_host = _PSQL_HOST_OVERRIDES.get(host_key)
+    if override_host:
+        override_result = _run_psql_exec(psql_container, pg_password, override_host, pg_port, pg_user, pg_db, sql, single_transaction)
+        override_output = (override_result.stdout or "") + (override_result.stderr or "")
+        if override_result.returncode == 0:
+            return 0, override_output
+        if not _is_pg_connection_error(override_output):
+            return override_result.returncode, (
+                f"容器 psql（docker exec）执行失败，container={psql_container}。\n"
+                f"  尝试 {override_host}:{pg_port} 错误：{override_output.strip()}\n"
+            )
+        _PSQL_HOST_OVERRIDES.pop(host_key, None)
+
     # First try with the configured host
-    exec_cmd = _make_psql_exec_cmd(psql_container, pg_password, pg_host, pg_port, pg_user, pg_db, sql)
-    exec_result = run_command(exec_cmd)
+    exec_result = _run_psql_exec(psql_container, pg_password, pg_host, pg_port, pg_user, pg_db, sql, single_transaction)
     if exec_result.returncode == 0:
         return 0, (exec_result.stdout or "") + (exec_result.stderr or "")
 
@@ -43,16 +197,13 @@ def run_psql_container_sql(target: dict, target_cfg: dict, sql: str) -> tuple[in
 
     # Only fallback to host.docker.internal if the failure is a connection error,
     # not a SQL/auth error from PG itself (which means connection already worked).
-    is_conn_error = any(tok in first_error.lower() for tok in (
-        "could not connect", "connection to server", "connection refused",
-        "no route to host", "network is unreachable", "name or service not known",
-    ))
+    is_conn_error = _is_pg_connection_error(first_error)
 
     fallback_error = ""
     if is_conn_error and pg_host not in ("host.docker.internal", "localhost", "127.0.0.1"):
-        fallback_cmd = _make_psql_exec_cmd(psql_container, pg_password, "host.docker.internal", pg_port, pg_user, pg_db, sql)
-        fallback_result = run_command(fallback_cmd)
+        fallback_result = _run_psql_exec(psql_container, pg_password, "host.docker.internal", pg_port, pg_user, pg_db, sql, single_transaction)
         if fallback_result.returncode == 0:
+            _PSQL_HOST_OVERRIDES[host_key] = "host.docker.internal"
             return 0, (fallback_result.stdout or "") + (fallback_result.stderr or "")
         fallback_error = (fallback_result.stdout or "") + (fallback_result.stderr or "")
 
@@ -66,22 +217,24 @@ def run_psql_container_sql(target: dict, target_cfg: dict, sql: str) -> tuple[in
 def build_clear_public_sql(selected_tables: list[str] | None = None) -> str:
     selected = parse_selected_tables(selected_tables)
     if not selected:
+        # One DROP over every public table: a single parse and lock pass instead of one per row
         return (
             "DO $$ "
-            "DECLARE r record; "
+            "DECLARE tbls text; "
             "BEGIN "
-            "FOR r IN SELECT tablename FROM pg_tables WHERE schemaname='public' LOOP "
-            "EXECUTE format('DROP TABLE IF EXISTS public.%I CASCADE', r.tablename); "
-            "END LOOP; "
+            "SELECT string_agg(format('public.%I', tablename), ', ') INTO tbls "
+            "FROM pg_tables WHERE schemaname='public'; "
+            "IF tbls IS NOT NULL THEN "
+            "EXECUTE 'DROP TABLE IF EXISTS ' || tbls || ' CASCADE'; "
+            "END IF; "
             "END $$;"
         )
 
-    stmts = [f"DROP TABLE IF EXISTS public.{pg_quote_ident(table)} CASCADE;" for table in selected]
-    return "\n".join(stmts)
+    return "DROP TABLE IF EXISTS " + ", ".join(f"public.{pg_quote_ident(table)}" for table in selected) + " CASCADE;"
 
 def clear_target_public_tables(db: str, config: dict, selected_tables: list[str] | None = None) -> tuple[int, str]:
     target_cfg = config.get("target", {})
-    target_uri = target_cfg.get("uri", "").replace("{{DB_NAME}}", db)
+    target_uri = fill_db_uri(target_cfg.get("uri", ""), db)
     target = parse_db_uri(target_uri)
 
     if target.get("scheme") not in ("postgresql", "pgsql", "postgres"):
@@ -113,7 +266,7 @@ def build_clear_public_views_sql() -> str:
 
 def clear_target_public_views(db: str, config: dict) -> tuple[int, str]:
     target_cfg = config.get("target", {})
-    target_uri = target_cfg.get("uri", "").replace("{{DB_NAME}}", db)
+    target_uri = fill_db_uri(target_cfg.get("uri", ""), db)
     target = parse_db_uri(target_uri)
 
     if target.get("scheme") not in ("postgresql", "pgsql", "postgres"):
@@ -126,21 +279,14 @@ def clear_target_public_views(db: str, config: dict) -> tuple[int, str]:
         return 0, prefix + out
     return code, prefix + out
 
+def _decode_rows(output: bytes | None) -> list[str]:
+    # mysql -N prints one row per line; decode the whole dump once and drop blank rows
+    if not output:
+        return []
+    return [row for row in (line.strip() for line in output.decode("utf-8", "replace").split("\n")) if row]
+
 def get_mysql_tables(mysql_container: str, user: str, password: str, db: str, host: str = "", port: int = 0) -> list[str]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        "--default-character-set=utf8mb4",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
     cmd.extend([
         "-e",
         (
@@ -148,26 +294,170 @@ def get_mysql_tables(mysql_container: str, user: str, password: str, db: str, ho
             f"WHERE table_schema='{db}' AND table_type='BASE TABLE' ORDER BY table_name;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password), text=False)
     if result.returncode != 0:
         return []
-    return [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
+    return _decode_rows(result.stdout)
+
+# One long-lived `docker exec -i ... mysql` client fed over stdin. Each query is
+# followed by a sentinel SELECT that marks the end of its rows; --force keeps the
+# client alive after a failing statement. query() returns None once the client is
+# gone or stops answering so callers can fall back to the one-shot helpers.
+class MysqlSession:
+    SENTINEL = "__FASTDBCONVERT_END__"
+    _SENTINEL_LINE = SENTINEL.encode("ascii") + b"\n"
+    # With --force and stderr discarded, a dropped server connection shows up
+    # only as a sentinel that never arrives
+    QUERY_TIMEOUT = 30.0
+
+    def __init__(self, mysql_container: str, user: str, password: str, host: str = "", port: int = 0) -> None:
+        cmd = list(mysql_exec_prefix(mysql_container, user, host, port, interactive=True))
+        cmd.extend(["-B", "--unbuffered", "--force"])
+        self.process = subprocess.Popen(
+            cmd,
+            env=mysql_exec_env(password),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        # Bytes read past the previous query's sentinel
+        self._pending = b""
+        self._lock = threading.Lock()
+        self._dead = False
+        # The pipe is read on a helper thread so query() can wait with a deadline
+        # on every platform (select() does not take pipes on Windows)
+        self._chunks: queue.Queue[bytes] = queue.Queue()
+        threading.Thread(target=self._read_output, args=(self.process.stdout.fileno(),), daemon=True).start()
+
+    def _read_output(self, fd: int) -> None:
+        while True:
+            try:
+                chunk = os.read(fd, 1 << 16)
+            except OSError:
+                chunk = b""
+            self._chunks.put(chunk)
+            if not chunk:
+                return
+
+    def _kill(self) -> None:
+        self._dead = True
+        self._pending = b""
+        try:
+            self.process.kill()
+        except OSError:
+            pass
+
+    def query(self, sql: str) -> list[str] | None:
+        with self._lock:
+            process = self.process
+            if self._dead or process.poll() is not None or process.stdin is None or process.stdout is None:
+                return None
+            statement = sql.strip().rstrip(";")
+            try:
+                process.stdin.write(f"{statement};\nSELECT '{self.SENTINEL}';\n".encode("utf-8"))
+                process.stdin.flush()
+            except (OSError, ValueError):
+                return None
+            # Collect chunks until the sentinel row shows up, then decode and
+            # split the whole result once instead of a readline per row
+            deadline = time.monotonic() + self.QUERY_TIMEOUT
+            marker = b"\n" + self._SENTINEL_LINE
+            # A leading newline lets a sentinel at the very start match like any other row
+            buf = bytearray(b"\n")
+            buf += self._pending
+            start = 0
+            while True:
+                pos = buf.find(marker, start)
+                if pos >= 0:
+                    break
+                start = max(0, len(buf) - len(marker) + 1)
+                try:
+                    chunk = self._chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    chunk = b""
+                if not chunk:
+                    self._kill()
+                    return None
+                buf += chunk
+            self._pending = bytes(buf[pos + len(marker):])
+            if not pos:
+                return []
+            return buf[1:pos].decode("utf-8", "replace").split("\n")
+
+    def count_tables(self, db: str) -> int | None:
+        rows = self.query(f"SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='{db}'")
+        if rows is None:
+            return None
+        head = rows[0].strip() if rows else ""
+        try:
+            return int(head)
+        except ValueError:
+            return 0
+
+    def count_tables_bulk(self, dbs: list[str]) -> dict[str, int] | None:
+        counts: dict[str, int] = {}
+        sql = build_table_counts_sql(dbs)
+        if sql:
+            rows = self.query(sql)
+            if rows is None:
+                return None
+            counts = parse_table_counts(rows)
+        for db in dbs:
+            if db in counts or is_safe_schema_name(db):
+                continue
+            count = self.count_tables(db)
+            if count is None:
+                return None
+            counts[db] = count
+        return counts
+
+    def db_sizes_bulk(self, dbs: list[str]) -> dict[str, int] | None:
+        sql = build_db_sizes_sql(dbs)
+        if not sql:
+            return {}
+        rows = self.query(sql)
+        if rows is None:
+            return None
+        sizes = parse_table_counts(rows)
+        return {db: sizes.get(db, 0) for db in dbs}
+
+    def list_databases(self) -> list[str] | None:
+        rows = self.query(_MYSQL_DATABASES_SQL)
+        if rows is None:
+            return None
+        return [row.strip() for row in rows if row.strip()]
+
+    def schema_bundle(self, db: str) -> dict[str, dict] | None:
+        rows = self.query(build_mysql_schema_bundle_sql(db))
+        if rows is None:
+            return None
+        return parse_mysql_schema_bundle(rows)
+
+    def list_tables(self, db: str) -> list[str] | None:
+        rows = self.query(
+            "SELECT table_name FROM information_schema.tables "
+            f"WHERE table_schema='{db}' AND table_type='BASE TABLE' ORDER BY table_name"
+        )
+        if rows is None:
+            return None
+        return [row.strip() for row in rows if row.strip()]
+
+    def close(self) -> None:
+        self._dead = True
+        process = self.process
+        try:
+            if process.stdin is not None:
+                process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
 
 def get_mysql_views(mysql_container: str, user: str, password: str, db: str, host: str = "", port: int = 0) -> list[str]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        "--default-character-set=utf8mb4",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
     cmd.extend([
         "-e",
         (
@@ -175,10 +465,10 @@ def get_mysql_views(mysql_container: str, user: str, password: str, db: str, hos
             f"WHERE table_schema='{db}' ORDER BY table_name;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password), text=False)
     if result.returncode != 0:
         return []
-    return [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
+    return _decode_rows(result.stdout)
 
 def get_mysql_view_definition(
     mysql_container: str,
@@ -189,20 +479,7 @@ def get_mysql_view_definition(
     host: str = "",
     port: int = 0,
 ) -> str:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        "--default-character-set=utf8mb4",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
     cmd.extend([
         "-e",
         (
@@ -210,7 +487,7 @@ def get_mysql_view_definition(
             f"WHERE table_schema='{db}' AND table_name='{view_name}';"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return ""
     lines = [line.rstrip("\r") for line in (result.stdout or "").splitlines() if line.strip()]
@@ -218,34 +495,26 @@ def get_mysql_view_definition(
         return ""
     return "\n".join(lines)
 
+@functools.lru_cache(maxsize=64)
+def _view_db_prefix_re(source_db: str) -> re.Pattern:
+    escaped = re.escape(source_db)
+    return re.compile(rf"`{escaped}`\.|\b{escaped}\.", re.IGNORECASE)
+
+def _replace_bt_ident(match: re.Match[str]) -> str:
+    return pg_quote_ident(match.group(1).lower())
+
+def _replace_date_part_func(match: re.Match[str]) -> str:
+    return f"EXTRACT({match.group(1).upper()} FROM {match.group(2).strip()})"
+
 def transform_mysql_view_definition(view_sql: str, source_db: str) -> str:
     transformed = (view_sql or "").strip().rstrip(";")
     if not transformed:
         return ""
 
-    transformed = re.sub(rf"`{re.escape(source_db)}`\.", "", transformed, flags=re.IGNORECASE)
-    transformed = re.sub(rf"\b{re.escape(source_db)}\.", "", transformed, flags=re.IGNORECASE)
-
-    def _replace_bt_ident(match: re.Match[str]) -> str:
-        return pg_quote_ident(match.group(1).lower())
-
-    def _replace_year_func(match: re.Match[str]) -> str:
-        expr = match.group(1).strip()
-        return f"EXTRACT(YEAR FROM {expr})"
-
-    def _replace_month_func(match: re.Match[str]) -> str:
-        expr = match.group(1).strip()
-        return f"EXTRACT(MONTH FROM {expr})"
-
-    def _replace_quarter_func(match: re.Match[str]) -> str:
-        expr = match.group(1).strip()
-        return f"EXTRACT(QUARTER FROM {expr})"
-
-    transformed = re.sub(r"`([^`]+)`", _replace_bt_ident, transformed)
-    transformed = re.sub(r"\bIFNULL\(", "COALESCE(", transformed, flags=re.IGNORECASE)
-    transformed = re.sub(r"\bYEAR\s*\(\s*([^\(\)]+?)\s*\)", _replace_year_func, transformed, flags=re.IGNORECASE)
-    transformed = re.sub(r"\bMONTH\s*\(\s*([^\(\)]+?)\s*\)", _replace_month_func, transformed, flags=re.IGNORECASE)
-    transformed = re.sub(r"\bQUARTER\s*\(\s*([^\(\)]+?)\s*\)", _replace_quarter_func, transformed, flags=re.IGNORECASE)
+    transformed = _view_db_prefix_re(source_db).sub("", transformed)
+    transformed = _VIEW_BT_IDENT_RE.sub(_replace_bt_ident, transformed)
+    transformed = _VIEW_IFNULL_RE.sub("COALESCE(", transformed)
+    transformed = _VIEW_DATE_PART_RE.sub(_replace_date_part_func, transformed)
     return transformed
 
 def sync_views_for_db(db: str, config: dict) -> tuple[int, str]:
@@ -264,7 +533,7 @@ def sync_views_for_db(db: str, config: dict) -> tuple[int, str]:
     output_lines: list[str] = [f"View sync start: {db}, views={len(views)}\n"]
     output_lines.append(f"Source view list ({db}): {', '.join(views)}\n")
     target_cfg = config.get("target", {})
-    target_uri = target_cfg.get("uri", "").replace("{{DB_NAME}}", db)
+    target_uri = fill_db_uri(target_cfg.get("uri", ""), db)
     target = parse_db_uri(target_uri)
 
     if target.get("scheme") not in ("postgresql", "pgsql", "postgres"):
@@ -350,19 +619,7 @@ def get_mysql_columns(
     host: str = "",
     port: int = 0,
 ) -> list[str]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
     cmd.extend([
         "-e",
         (
@@ -370,10 +627,10 @@ def get_mysql_columns(
             f"WHERE table_schema='{db}' AND table_name='{table}' ORDER BY ordinal_position;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password), text=False)
     if result.returncode != 0:
         return []
-    return [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
+    return _decode_rows(result.stdout)
 
 def get_mysql_column_defs(
     mysql_container: str,
@@ -384,19 +641,7 @@ def get_mysql_column_defs(
     host: str = "",
     port: int = 0,
 ) -> list[dict[str, str]]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
     cmd.extend([
         "-e",
         (
@@ -404,15 +649,12 @@ def get_mysql_column_defs(
             f"WHERE table_schema='{db}' AND table_name='{table}' ORDER BY ordinal_position;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password), text=False)
     if result.returncode != 0:
         return []
 
     column_defs: list[dict[str, str]] = []
-    for line in (result.stdout or "").splitlines():
-        row = line.strip()
-        if not row:
-            continue
+    for row in _decode_rows(result.stdout):
         parts = row.split("\t")
         if len(parts) < 2:
             continue
@@ -431,19 +673,7 @@ def get_mysql_primary_key_map(
     host: str = "",
     port: int = 0,
 ) -> dict[str, list[str]]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
     cmd.extend([
         "-e",
         (
@@ -457,7 +687,7 @@ def get_mysql_primary_key_map(
             "ORDER BY tc.table_name, k.ordinal_position;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return {}
 
@@ -479,6 +709,8 @@ def get_mysql_primary_key_map(
 def sql_quote_literal(value: str) -> str:
     return "'" + value.replace("'", "''") + "'"
 
+_PSQL_STDIN_ERROR_RE = re.compile(r"psql:<stdin>:(\d+):")
+
 def build_add_primary_keys_sql(pk_map: dict[str, list[str]]) -> str:
     blocks: list[str] = []
     for table, columns in pk_map.items():
@@ -509,16 +741,23 @@ def build_add_primary_keys_sql(pk_map: dict[str, list[str]]) -> str:
         )
     return "\n".join(blocks)
 
-def ensure_target_primary_keys(db: str, config: dict, selected_tables: list[str] | None = None) -> tuple[int, str]:
-    mysql_conn = resolve_mysql_conn(config, db)
-    pk_map = get_mysql_primary_key_map(
-        str(mysql_conn.get("container", "")),
-        str(mysql_conn.get("user", "")),
-        str(mysql_conn.get("password", "")),
-        db,
-        host=str(mysql_conn.get("host", "")),
-        port=int(mysql_conn.get("port", 0) or 0),
-    )
+def ensure_target_primary_keys(
+    db: str,
+    config: dict,
+    selected_tables: list[str] | None = None,
+    pk_map: dict[str, list[str]] | None = None,
+) -> tuple[int, str]:
+    # Callers holding a schema bundle pass its primary keys and skip the source query
+    if pk_map is None:
+        mysql_conn = resolve_mysql_conn(config, db)
+        pk_map = get_mysql_primary_key_map(
+            str(mysql_conn.get("container", "")),
+            str(mysql_conn.get("user", "")),
+            str(mysql_conn.get("password", "")),
+            db,
+            host=str(mysql_conn.get("host", "")),
+            port=int(mysql_conn.get("port", 0) or 0),
+        )
     selected = parse_selected_tables(selected_tables)
     if selected:
         selected_keys = {name.lower() for name in selected}
@@ -528,13 +767,34 @@ def ensure_target_primary_keys(db: str, config: dict, selected_tables: list[str]
         return 0, f"Primary key ensure skipped: no source primary keys found in {db}\n"
 
     target_cfg = config.get("target", {})
-    target_uri = target_cfg.get("uri", "").replace("{{DB_NAME}}", db)
+    target_uri = fill_db_uri(target_cfg.get("uri", ""), db)
     target = parse_db_uri(target_uri)
 
     if target.get("scheme") not in ("postgresql", "pgsql", "postgres"):
         return 1, f"Skip ensure primary keys: unsupported target scheme {target.get('scheme')}\n"
 
     output_lines: list[str] = [f"Ensuring target primary keys: {target.get('database', '')}, tables={len(pk_map)}\n"]
+    # One psql session for all tables, but each ALTER commits on its own: a single
+    # transaction would hold every table's lock until the end (max_locks_per_transaction)
+    # and one bad table would undo all the others
+    pk_map = {table: columns for table, columns in pk_map.items() if columns}
+    code, out = run_psql_container_sql(target, target_cfg, build_add_primary_keys_sql(pk_map), single_transaction=False)
+    if code == 0:
+        output_lines.append(f"Primary key ensure success: {db}\n")
+        return 0, "".join(output_lines)
+
+    # Each table is one line of the script, so the failing line names the table
+    match = _PSQL_STDIN_ERROR_RE.search(out)
+    if match:
+        tables = list(pk_map)
+        index = int(match.group(1)) - 1
+        if 0 <= index < len(tables):
+            output_lines.append(f"Primary key ensure failed table: {tables[index]}\n")
+            output_lines.append(out)
+            return code, "".join(output_lines)
+
+    # No line number (e.g. a connection error): the blocks are idempotent, so
+    # retrying table by table finds the culprit
     for table, columns in pk_map.items():
         sql = build_add_primary_keys_sql({table: columns})
         if not sql:
@@ -569,7 +829,7 @@ def build_clear_public_data_sql(selected_tables: list[str] | None = None) -> str
 
 def clear_target_public_table_data(db: str, config: dict, selected_tables: list[str] | None = None) -> tuple[int, str]:
     target_cfg = config.get("target", {})
-    target_uri = target_cfg.get("uri", "").replace("{{DB_NAME}}", db)
+    target_uri = fill_db_uri(target_cfg.get("uri", ""), db)
     target = parse_db_uri(target_uri)
 
     if target.get("scheme") not in ("postgresql", "pgsql", "postgres"):
@@ -590,7 +850,7 @@ def clear_target_public_table_data(db: str, config: dict, selected_tables: list[
 
 def get_target_json_columns(db: str, config: dict, selected_tables: list[str] | None = None) -> tuple[int, dict[str, list[str]], str]:
     target_cfg = config.get("target", {})
-    target_uri = target_cfg.get("uri", "").replace("{{DB_NAME}}", db)
+    target_uri = fill_db_uri(target_cfg.get("uri", ""), db)
     target = parse_db_uri(target_uri)
 
     if target.get("scheme") not in ("postgresql", "pgsql", "postgres"):
@@ -631,7 +891,7 @@ def get_target_json_columns(db: str, config: dict, selected_tables: list[str] |
 
 def coerce_target_json_columns_to_text(db: str, config: dict, selected_tables: list[str] | None = None) -> tuple[int, str]:
     target_cfg = config.get("target", {})
-    target_uri = target_cfg.get("uri", "").replace("{{DB_NAME}}", db)
+    target_uri = fill_db_uri(target_cfg.get("uri", ""), db)
     target = parse_db_uri(target_uri)
 
     if target.get("scheme") not in ("postgresql", "pgsql", "postgres"):
@@ -670,19 +930,7 @@ def get_mysql_split_pk(
     host: str = "",
     port: int = 0,
 ) -> str | None:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
     cmd.extend([
         "-e",
         (
@@ -699,7 +947,7 @@ def get_mysql_split_pk(
             "ORDER BY k.ordinal_position;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return None
     rows = [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
@@ -708,48 +956,92 @@ def get_mysql_split_pk(
     parts = rows[0].split("\t")
     if len(parts) < 2:
         return None
-    col_name = parts[0].strip()
-    data_type = parts[1].strip().lower()
-    numeric_types = {
-        "tinyint",
-        "smallint",
-        "mediumint",
-        "int",
-        "integer",
-        "bigint",
-        "decimal",
-        "numeric",
-    }
-    if data_type not in numeric_types:
+    return _numeric_split_pk([(parts[0].strip(), parts[1].strip().lower())])
+
+_SPLIT_PK_NUMERIC_TYPES = frozenset({
+    "tinyint",
+    "smallint",
+    "mediumint",
+    "int",
+    "integer",
+    "bigint",
+    "decimal",
+    "numeric",
+})
+
+def _numeric_split_pk(pk_columns: list[tuple[str, str]]) -> str | None:
+    # DataX can only split on a single-column numeric primary key
+    if len(pk_columns) != 1:
+        return None
+    col_name, data_type = pk_columns[0]
+    if data_type not in _SPLIT_PK_NUMERIC_TYPES:
         return None
     return col_name
 
+def build_mysql_schema_bundle_sql(db: str) -> str:
+    schema = mysql_quote_literal(db)
+    return (
+        "SELECT 'C', table_name, column_name, data_type FROM information_schema.columns "
+        f"WHERE table_schema={schema} ORDER BY table_name, ordinal_position;\n"
+        "SELECT 'P', k.table_name, k.column_name, c.data_type FROM information_schema.table_constraints tc "
+        "JOIN information_schema.key_column_usage k "
+        "ON tc.constraint_name = k.constraint_name "
+        "AND tc.table_schema = k.table_schema "
+        "AND tc.table_name = k.table_name "
+        "JOIN information_schema.columns c "
+        "ON c.table_schema = k.table_schema "
+        "AND c.table_name = k.table_name "
+        "AND c.column_name = k.column_name "
+        f"WHERE tc.constraint_type='PRIMARY KEY' AND tc.table_schema={schema} "
+        "ORDER BY k.table_name, k.ordinal_position"
+    )
+
+def parse_mysql_schema_bundle(lines: list[str]) -> dict[str, dict]:
+    column_defs: dict[str, list[dict[str, str]]] = {}
+    pk_columns: dict[str, list[tuple[str, str]]] = {}
+    for line in lines:
+        parts = line.strip().split("\t")
+        if len(parts) < 4:
+            continue
+        tag, table_name, column_name, data_type = (part.strip() for part in parts[:4])
+        if not table_name or not column_name:
+            continue
+        if tag == "C":
+            column_defs.setdefault(table_name, []).append({"name": column_name, "data_type": data_type.lower()})
+        elif tag == "P":
+            pk_columns.setdefault(table_name, []).append((column_name, data_type.lower()))
+    return {
+        table: {
+            "column_defs": defs,
+            "primary_key": [name for name, _ in pk_columns.get(table, [])],
+            "split_pk": _numeric_split_pk(pk_columns.get(table, [])),
+        }
+        for table, defs in column_defs.items()
+    }
+
+def get_mysql_schema_bundle(
+    mysql_container: str,
+    user: str,
+    password: str,
+    db: str,
+    host: str = "",
+    port: int = 0,
+) -> dict[str, dict] | None:
+    # Columns, types and primary keys for every table of a schema in one round trip
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
+    cmd.extend(["-e", build_mysql_schema_bundle_sql(db) + ";"])
+    result = run_command(cmd, env=mysql_exec_env(password), text=False)
+    if result.returncode != 0:
+        return None
+    return parse_mysql_schema_bundle(_decode_rows(result.stdout))
+
 def get_mysql_databases(mysql_container: str, user: str, password: str, host: str = "", port: int = 0) -> list[str]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
-    cmd.extend([
-        "-e",
-        (
-            "SELECT schema_name FROM information_schema.schemata "
-            "WHERE schema_name NOT IN ('information_schema','mysql','performance_schema','sys') "
-            "ORDER BY schema_name;"
-        ),
-    ])
-    result = run_command(cmd)
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
+    cmd.extend(["-e", _MYSQL_DATABASES_SQL + ";"])
+    result = run_command(cmd, env=mysql_exec_env(password), text=False)
     if result.returncode != 0:
         return []
-    return [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
+    return _decode_rows(result.stdout)
 
 def get_target_databases(target_uri: str, psql_container: str) -> list[str]:
     target = parse_db_uri(target_uri)
@@ -759,8 +1051,9 @@ def get_target_databases(target_uri: str, psql_container: str) -> list[str]:
     password_raw = str(target.get("password", "") or "")
     db_raw = str(target.get("database", "") or "")
 
+    host_key = (psql_container.strip(), host_raw, port_raw)
     host_candidates: list[str] = []
-    for host in [host_raw, "host.docker.internal"]:
+    for host in [_PSQL_HOST_OVERRIDES.get(host_key, ""), host_raw, "host.docker.internal"]:
         value = host.strip()
         if value and value not in host_candidates:
             host_candidates.append(value)
@@ -773,6 +1066,17 @@ def get_target_databases(target_uri: str, psql_container: str) -> list[str]:
 
     sql = "SELECT datname FROM pg_database WHERE datistemplate = false ORDER BY datname;"
 
+    for db in db_candidates:
+        conn = _pg_connection(host_raw, port_raw, user_raw, password_raw, db)
+        if conn is None:
+            continue
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                return [str(row[0]) for row in cur.fetchall()]
+        except psycopg.Error:
+            continue
+
     for host in host_candidates:
         for db in db_candidates:
             cmd = [
@@ -780,6 +1084,8 @@ def get_target_databases(target_uri: str, psql_container: str) -> list[str]:
                 "exec",
                 "-e",
                 f"PGPASSWORD={password_raw}",
+                "-e",
+                f"PGCONNECT_TIMEOUT={_PSQL_CONNECT_TIMEOUT}",
                 psql_container,
                 "psql",
                 "-h",
@@ -800,6 +1106,8 @@ def get_target_databases(target_uri: str, psql_container: str) -> list[str]:
             result = run_command(cmd)
             if result.returncode != 0:
                 continue
+            if host != host_raw:
+                _PSQL_HOST_OVERRIDES[host_key] = host
             return [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
     return []
 
@@ -1,4 +1,3 @@
-import glob
 import json
 import os
 import time
@@ -7,10 +6,14 @@ from .common import parse_db_uri
 
 
 def mysql_ident(name: str) -> str:
-    return "`" + name.replace("`", "``") + "`"
+    if "`" in name:
+        name = name.replace("`", "``")
+    return f"`{name}`"
 
 def pg_ident(name: str) -> str:
-    return '"' + name.replace('"', '""') + '"'
+    if '"' in name:
+        name = name.replace('"', '""')
+    return f'"{name}"'
 
 def build_mysql_query_sql(table: str, column_defs: list[dict[str, str]]) -> str:
     select_items: list[str] = []
@@ -113,10 +116,18 @@ def build_datax_job(
         job["job"]["content"][0]["reader"]["parameter"]["splitPk"] = split_pk
 
     job_folder = os.path.join(workspace, job_dir)
-    os.makedirs(job_folder, exist_ok=True)
     job_file = os.path.join(job_folder, f"{db}.{table}.json")
-    with open(job_file, "w", encoding="utf-8") as f:
-        json.dump(job, f, ensure_ascii=False, indent=2)
+    # Compact json.dumps runs in the C encoder in one call; indent= falls back to
+    # the pure-Python encoder and DataX does not need pretty-printed jobs
+    content = json.dumps(job, ensure_ascii=False, separators=(",", ":"))
+    # The folder exists for every table but the first; only create it when the open says so
+    try:
+        f = open(job_file, "w", encoding="utf-8")
+    except FileNotFoundError:
+        os.makedirs(job_folder, exist_ok=True)
+        f = open(job_file, "w", encoding="utf-8")
+    with f:
+        f.write(content)
     return job_file
 
 def build_datax_command(job_file: str, datax_cfg: dict) -> list[str]:
@@ -147,12 +158,14 @@ def cleanup_datax_jobs_for_db(workspace: str, db: str, datax_cfg: dict) -> None:
     folder = os.path.join(workspace, job_dir)
     if not os.path.isdir(folder):
         return
-    pattern = os.path.join(folder, f"{db}.*.json")
-    for path in glob.glob(pattern):
-        try:
-            os.remove(path)
-        except OSError:
-            pass
+    # Literal prefix/suffix checks over a scandir listing instead of an fnmatch glob
+    prefix = f"{db}."
+    for name in list_dir_files(folder):
+        if name.startswith(prefix) and name.endswith(".json"):
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
 
 def cleanup_datax_job_file(path: str) -> None:
     try:
@@ -179,10 +192,41 @@ def cleanup_pgloader_rendered_file(path: str) -> None:
     except OSError:
         pass
 
+def list_dir_files(folder: str) -> tuple[str, ...]:
+    # scandir avoids a stat per entry
+    try:
+        with os.scandir(folder) as it:
+            return tuple(entry.name for entry in it if entry.is_file())
+    except OSError:
+        return ()
+
 def cleanup_pgloader_rendered_files_for_db(workspace: str, db: str) -> None:
-    pattern = os.path.join(workspace, f".pgloader_rendered_{db}*.load")
-    for path in glob.glob(pattern):
-        cleanup_pgloader_rendered_file(path)
+    prefix = f".pgloader_rendered_{db}"
+    for name in list_dir_files(workspace):
+        if name.startswith(prefix) and name.endswith(".load"):
+            cleanup_pgloader_rendered_file(os.path.join(workspace, name))
+
+def _prune_old_files(folder: str, cutoff: float) -> int:
+    # One scandir per directory: DirEntry caches the type and stat, and the
+    # survivor count replaces a second listdir before rmdir
+    survivors = 0
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not _prune_old_files(entry.path, cutoff):
+                            os.rmdir(entry.path)
+                            continue
+                    elif entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        continue
+                except OSError:
+                    pass
+                survivors += 1
+    except OSError:
+        return 1
+    return survivors
 
 def cleanup_old_logs(workspace: str, log_dirs: list[str], retention_days: int) -> None:
     if retention_days <= 0:
@@ -194,21 +238,7 @@ def cleanup_old_logs(workspace: str, log_dirs: list[str], retention_days: int) -
         folder = path if os.path.isabs(path) else os.path.join(workspace, path)
         if not os.path.isdir(folder):
             continue
-        for root, dirs, files in os.walk(folder, topdown=False):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                try:
-                    if os.path.getmtime(file_path) < cutoff:
-                        os.remove(file_path)
-                except OSError:
-                    pass
-            for dir_name in dirs:
-                dir_path = os.path.join(root, dir_name)
-                try:
-                    if not os.listdir(dir_path):
-                        os.rmdir(dir_path)
-                except OSError:
-                    pass
+        _prune_old_files(folder, cutoff)
 
 def cleanup_datax_logs_by_retention(workspace: str, datax_cfg: dict) -> None:
     retention_days_raw = datax_cfg.get("log_retention_days", 7)
@@ -3,15 +3,16 @@ import queue
 import subprocess
 import threading
 import tkinter as tk
+from collections import deque
 
-from pgloader_gui_core import DEFAULT_CONFIG, SYNC_HISTORY_FILE, URI_HISTORY_FILE
+from pgloader_gui_core import DEFAULT_CONFIG, SYNC_HISTORY_FILE, URI_HISTORY_FILE, MysqlSession
 from pgloader_gui_parts.config_mixin import ConfigMixin
 from pgloader_gui_parts.data_mixin import DataMixin
 from pgloader_gui_parts.history_mixin import HistoryMixin
 from pgloader_gui_parts.ui_build_mixin import UiBuildMixin
 from pgloader_gui_parts.ui_mixin import UiMixin
 from pgloader_gui_parts.sync_worker_mixin import SyncWorkerMixin
-from pgloader_gui_parts.worker_mixin import WorkerMixin
+from pgloader_gui_parts.worker_mixin import LogBuffer, WakeupQueue, WorkerMixin
 
 
 class PgloaderGUI(ConfigMixin, DataMixin, HistoryMixin, UiBuildMixin, UiMixin, SyncWorkerMixin, WorkerMixin, tk.Tk):
@@ -23,7 +24,9 @@ class PgloaderGUI(ConfigMixin, DataMixin, HistoryMixin, UiBuildMixin, UiMixin, S
         self.resizable(True, True)
 
         self.workspace = os.path.abspath(os.path.dirname(__file__))
-        self.queue: "queue.Queue[tuple]" = queue.Queue()
+        self.queue: "queue.Queue[tuple]" = WakeupQueue()
+        self.queue_wakeup_fds: tuple[int, int] | None = None
+        self.queue_wakeup_pending = False
         self.worker_thread: threading.Thread | None = None
         self.current_process: subprocess.Popen | None = None
         self.active_processes: set[subprocess.Popen] = set()
@@ -34,14 +37,36 @@ class PgloaderGUI(ConfigMixin, DataMixin, HistoryMixin, UiBuildMixin, UiMixin, S
         self.last_progress_time = 0.0
         self.last_progress_count = 0
         self.max_log_lines = 4000
+        self.log_buffer = LogBuffer(self.max_log_lines)
+        self.log_trim_batch_lines = 400
+        self.log_flush_ms = 100
+        self.log_flush_after_id = None
+        self.poll_idle_ms = 100
+        self.poll_busy_ms = 20
+        self.poll_max_idle_ms = 400
+        self.poll_delay_ms = self.poll_idle_ms
         self.selected_dbs: list[str] = []
+        # Mirrors db_list so selection handlers index Python data instead of calling into Tcl per row
+        self.db_items: list[str] = []
         self.selected_tables: list[str] = []
         self.table_all_items: list[str] = []
         self.info_refresh_after_id: str | None = None
+        self.db_info_token = 0
+        self.db_info_thread: threading.Thread | None = None
+        self.db_size_cache: dict[tuple, tuple[int, float]] = {}
+        self.db_size_cache_ttl = 60.0
+        self.mysql_tables_cache: dict[tuple, tuple[list[str], float]] = {}
+        self.mysql_tables_cache_ttl = 30.0
+        self.mysql_info_sessions: dict[tuple, MysqlSession | None] = {}
+        self.mysql_info_sessions_lock = threading.Lock()
+        self.table_filter_after_id: str | None = None
+        self.table_filter_items_ref: list[str] | None = None
+        self.table_filter_last_keyword = ""
+        self.table_filter_last_indices: list[int] = []
         self.fallback_databases: list[str] = []
         self.full_sync_dbs: list[str] = []
         self.sync_history_path = os.path.join(self.workspace, SYNC_HISTORY_FILE)
-        self.sync_history_records: list[dict] = []
+        self.sync_history_records: deque[dict] = deque(maxlen=1000)
         self.uri_history_path = os.path.join(self.workspace, URI_HISTORY_FILE)
         self.uri_history_records: list[str] = []
         self.current_mode = ""
@@ -69,12 +94,19 @@ class PgloaderGUI(ConfigMixin, DataMixin, HistoryMixin, UiBuildMixin, UiMixin, S
         self.datax_log_retention_days = tk.StringVar(value="7")
         self.datax_verbose_log = tk.BooleanVar(value=False)
         self.table_filter_keyword = tk.StringVar(value="")
+        self.config_dirty = True
+        self.collected_config: tuple[str, dict] | None = None
+        self.env_cache: tuple[str, dict] | None = None
+        self.load_text_content: str | None = None
+        self.pgloader_parallel = 1
+        self.run_parallel = False
 
         self._build_ui()
+        self._watch_config_vars()
         self._load_uri_history_records()
         self._load_sync_history_records()
         self._load_config_safe()
-        self._poll_queue()
+        self._start_queue_pump()
 
 
 if __name__ == "__main__":
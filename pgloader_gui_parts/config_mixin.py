@@ -7,14 +7,14 @@ import threading
 import time
 import tkinter as tk
 from collections import deque
-from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
-from tkinter import filedialog, messagebox, ttk
+from tkinter import messagebox, ttk
 
 from pgloader_gui_core import (
     DEFAULT_CONFIG,
     SOURCE_TYPES,
     SYNC_HISTORY_FILE,
     URI_HISTORY_FILE,
+    MysqlSession,
     build_datax_command,
     build_datax_job,
     build_mysql_uri_from_conn,
@@ -29,14 +29,18 @@ from pgloader_gui_core import (
     clear_target_public_table_data,
     clear_target_public_tables,
     clear_target_public_views,
+    copy_config,
     ensure_target_primary_keys,
     filter_tables_by_selected,
+    fill_db_uri,
     get_mysql_columns,
     get_mysql_databases,
     get_mysql_split_pk,
     get_mysql_tables,
     get_target_databases,
+    get_db_sizes_bulk,
     get_total_tables,
+    get_total_tables_bulk,
     is_cleanup_jobs_on_finish,
     is_datax_jvm_oom,
     is_datax_key_log,
@@ -47,10 +51,13 @@ from pgloader_gui_core import (
     parse_db_uri,
     parse_selected_tables,
     patch_rendered_load_for_full_sync,
+    read_template,
     render_load_file,
     resolve_datax_home,
     resolve_mysql_conn,
     run_command,
+    run_psql_container_sql,
+    running_containers,
     save_config,
     should_skip_table,
     sync_views_for_db,
@@ -59,6 +66,8 @@ from pgloader_gui_core import (
 
 class ConfigMixin:
     def _browse_config(self) -> None:
+        from tkinter import filedialog
+
         path = filedialog.askopenfilename(initialdir=self.workspace, filetypes=[("JSON", "*.json")])
         if path:
             self.config_path.set(path)
@@ -72,6 +81,8 @@ class ConfigMixin:
 
         self.fallback_databases = [db for db in config.get("databases", []) if isinstance(db, str)]
         self.db_list.delete(0, tk.END)
+        self.db_items = []
+        self._reset_db_info_cache()
         self._clear_table_list()
         self.size_label.configure(text="已选数据库大小: --")
 
@@ -89,10 +100,17 @@ class ConfigMixin:
 
         pgloader_cfg = config.get("pgloader", {})
         self.pgloader_image.set(pgloader_cfg.get("image", "dimitri/pgloader:v3.6.7"))
+        try:
+            self.pgloader_parallel = max(1, int(pgloader_cfg.get("parallel", 1) or 1))
+        except (TypeError, ValueError):
+            self.pgloader_parallel = 1
+        self.config_dirty = True
         self.show_output.set(True)
-        env = pgloader_cfg.get("env", {})
-        self.env_text.delete("1.0", tk.END)
-        self.env_text.insert(tk.END, json.dumps(env, ensure_ascii=False, indent=2))
+        env_content = json.dumps(pgloader_cfg.get("env", {}), ensure_ascii=False, indent=2)
+        # Reloading a profile with the same env leaves the Text widget untouched
+        if env_content != self.env_text.get("1.0", "end-1c"):
+            self.env_text.delete("1.0", tk.END)
+            self.env_text.insert(tk.END, env_content)
 
         datax_cfg = config.get("datax", {})
         self.datax_enabled.set(bool(datax_cfg.get("enabled", False)))
@@ -108,12 +126,59 @@ class ConfigMixin:
         self._reload_template()
         self._refresh_databases()
 
-    def _save_config_safe(self) -> None:
+    def _watch_config_vars(self) -> None:
+        for var in (
+            self.load_template,
+            self.source_type,
+            self.source_uri,
+            self.target_uri,
+            self.target_psql_container,
+            self.mysql_container,
+            self.mysql_user,
+            self.mysql_password,
+            self.pgloader_image,
+            self.datax_enabled,
+            self.datax_home,
+            self.datax_python,
+            self.datax_source_uri,
+            self.datax_channel,
+            self.datax_batch_size,
+            self.datax_table_parallelism,
+            self.datax_log_retention_days,
+            self.datax_verbose_log,
+        ):
+            var.trace_add("write", self._mark_config_dirty)
+
+    def _mark_config_dirty(self, *_args) -> None:
+        self.config_dirty = True
+
+    def _parse_env_text(self, env_raw: str) -> dict:
+        # The parsed env only ever ends up inside the config that _collect_config
+        # deep-copies on the way out, so the cached dict is handed back as is
+        cached = self.env_cache
+        if cached is not None and cached[0] == env_raw:
+            return cached[1]
+        env = {} if not env_raw or env_raw.isspace() else json.loads(env_raw)
+        self.env_cache = (env_raw, env)
+        return env
+
+    def _collect_config(self, dbs: list[str]) -> dict | None:
+        cached = self.collected_config
+        # The env Text only needs reading back out of Tk once it has been edited
+        if cached is not None and not self.env_text.edit_modified():
+            env_raw = cached[0]
+        else:
+            env_raw = self.env_text.get("1.0", "end-1c")
+        if not self.config_dirty and cached is not None and cached[0] == env_raw:
+            config = copy_config(cached[1])
+            config["databases"] = list(dbs)
+            return config
+
         try:
-            env = json.loads(self.env_text.get("1.0", tk.END).strip() or "{}")
+            env = self._parse_env_text(env_raw)
         except json.JSONDecodeError as exc:
             messagebox.showerror("错误", f"环境变量 JSON 无效: {exc}")
-            return
+            return None
 
         try:
             datax_channel = int(self.datax_channel.get().strip() or "2")
@@ -122,17 +187,17 @@ class ConfigMixin:
             datax_log_retention_days = int(self.datax_log_retention_days.get().strip() or "7")
         except ValueError:
             messagebox.showerror("错误", "DataX 并发通道、批大小、表并行数、日志保留天数必须是整数。")
-            return
+            return None
 
         if datax_table_parallelism < 1:
             messagebox.showerror("错误", "DataX 表并行数必须大于等于 1。")
-            return
+            return None
         if datax_log_retention_days < 1:
             messagebox.showerror("错误", "日志保留天数必须大于等于 1。")
-            return
+            return None
 
         config = {
-            "databases": list(self.db_list.get(0, tk.END)),
+            "databases": list(dbs),
             "load_template": self.load_template.get().strip(),
             "source": {
                 "type": self.source_type.get().strip(),
@@ -152,6 +217,7 @@ class ConfigMixin:
                 "env": env,
                 "clear_public_before_sync": True,
                 "show_output": True,
+                "parallel": self.pgloader_parallel,
             },
             "datax": {
                 "enabled": bool(self.datax_enabled.get()),
@@ -176,9 +242,18 @@ class ConfigMixin:
                 "env": {},
             },
         }
+        self.collected_config = (env_raw, config)
+        self.config_dirty = False
+        self.env_text.edit_modified(False)
+        return copy_config(config)
+
+    def _save_config_safe(self) -> None:
+        config = self._collect_config(list(self.db_items))
+        if config is None:
+            return
 
         try:
-            save_config(self.config_path.get(), config)
+            written = save_config(self.config_path.get(), config)
         except Exception as exc:
             messagebox.showerror("错误", f"保存配置失败: {exc}")
             return
@@ -187,21 +262,29 @@ class ConfigMixin:
         self._remember_uri(config["target"].get("uri", ""))
         self._remember_uri(config.get("datax", {}).get("source_uri", ""))
 
-        messagebox.showinfo("已保存", "配置已保存。")
+        if written:
+            messagebox.showinfo("已保存", "配置已保存。")
+        else:
+            messagebox.showinfo("未变更", "配置未变更，无需保存。")
 
     def _reload_template(self) -> None:
         template_path = os.path.join(self.workspace, self.load_template.get().strip())
-        if not os.path.exists(template_path):
-            self.load_text.delete("1.0", tk.END)
-            return
         try:
-            with open(template_path, "r", encoding="utf-8") as f:
-                content = f.read()
+            # Shares the mtime-keyed cache the sync worker renders from
+            content = read_template(template_path)
+        except FileNotFoundError:
+            content = ""
         except Exception as exc:
             messagebox.showerror("错误", f"读取模板失败: {exc}")
             return
+        # Same text still shown and not edited since: leave the widget alone
+        if content == self.load_text_content and not self.load_text.edit_modified():
+            return
         self.load_text.delete("1.0", tk.END)
-        self.load_text.insert(tk.END, content)
+        if content:
+            self.load_text.insert(tk.END, content)
+        self.load_text.edit_modified(False)
+        self.load_text_content = content
 
     def _save_template(self) -> None:
         template_path = os.path.join(self.workspace, self.load_template.get().strip())
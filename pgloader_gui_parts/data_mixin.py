@@ -7,14 +7,14 @@ import threading
 import time
 import tkinter as tk
 from collections import deque
-from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
-from tkinter import filedialog, messagebox, ttk
+from tkinter import messagebox, ttk
 
 from pgloader_gui_core import (
     DEFAULT_CONFIG,
     SOURCE_TYPES,
     SYNC_HISTORY_FILE,
     URI_HISTORY_FILE,
+    MysqlSession,
     build_datax_command,
     build_datax_job,
     build_mysql_uri_from_conn,
@@ -29,14 +29,18 @@ from pgloader_gui_core import (
     clear_target_public_table_data,
     clear_target_public_tables,
     clear_target_public_views,
+    copy_config,
     ensure_target_primary_keys,
     filter_tables_by_selected,
+    fill_db_uri,
     get_mysql_columns,
     get_mysql_databases,
     get_mysql_split_pk,
     get_mysql_tables,
     get_target_databases,
+    get_db_sizes_bulk,
     get_total_tables,
+    get_total_tables_bulk,
     is_cleanup_jobs_on_finish,
     is_datax_jvm_oom,
     is_datax_key_log,
@@ -47,25 +51,34 @@ from pgloader_gui_core import (
     parse_db_uri,
     parse_selected_tables,
     patch_rendered_load_for_full_sync,
+    read_template,
     render_load_file,
     resolve_datax_home,
     resolve_mysql_conn,
     run_command,
+    run_psql_container_sql,
+    running_containers,
     save_config,
     should_skip_table,
     sync_views_for_db,
 )
 
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
 
 class DataMixin:
     def _add_db(self) -> None:
-        db = tk.simpledialog.askstring("新增数据库", "数据库名称:")
+        from tkinter import simpledialog
+
+        db = simpledialog.askstring("新增数据库", "数据库名称:")
         if db:
             self.db_list.insert(tk.END, db.strip())
+            self.db_items.append(db.strip())
 
     def _remove_db(self) -> None:
         for idx in reversed(self.db_list.curselection()):
             self.db_list.delete(idx)
+            del self.db_items[idx]
 
     def _on_db_select(self, _event=None) -> None:
         if self.info_refresh_after_id is not None:
@@ -74,8 +87,10 @@ class DataMixin:
             except Exception:
                 pass
             self.info_refresh_after_id = None
+        # A new selection retires any refresh still running for the old one
+        self.db_info_token += 1
 
-        dbs = [self.db_list.get(i) for i in self.db_list.curselection()]
+        dbs = [self.db_items[i] for i in self.db_list.curselection()]
         if not dbs:
             self.selected_dbs = []
             self.selected_tables = []
@@ -91,7 +106,8 @@ class DataMixin:
         else:
             self.selected_tables = []
             self._clear_table_list()
-        self._refresh_db_info()
+        # Clicking through the list quickly should only query the last selection
+        self.info_refresh_after_id = self.after(150, self._refresh_db_info)
 
     def _on_table_select(self, _event=None) -> None:
         visible_tables = [self.table_list.get(i) for i in range(self.table_list.size())]
@@ -104,11 +120,11 @@ class DataMixin:
 
     def _refresh_full_sync_list_widget(self) -> None:
         self.full_sync_list.delete(0, tk.END)
-        for db in self.full_sync_dbs:
-            self.full_sync_list.insert(tk.END, db)
+        if self.full_sync_dbs:
+            self.full_sync_list.insert(tk.END, *self.full_sync_dbs)
 
     def _add_to_full_sync(self) -> None:
-        selected = [self.db_list.get(i) for i in self.db_list.curselection()]
+        selected = [self.db_items[i] for i in self.db_list.curselection()]
         if not selected:
             return
         exists = {db.lower() for db in self.full_sync_dbs}
@@ -136,19 +152,43 @@ class DataMixin:
         self._refresh_full_sync_list_widget()
 
     def _on_table_filter_change(self, _event=None) -> None:
+        if self.table_filter_after_id is not None:
+            try:
+                self.after_cancel(self.table_filter_after_id)
+            except Exception:
+                pass
+        self.table_filter_after_id = self.after(120, self._apply_table_filter)
+
+    def _apply_table_filter(self) -> None:
+        self.table_filter_after_id = None
         self._refresh_table_list_widget()
 
-    def _refresh_table_list_widget(self) -> None:
-        keyword = self.table_filter_keyword.get().strip().lower()
+    def _filter_table_indices(self, keyword: str) -> list[int]:
+        items = self.table_all_items
+        last_keyword = self.table_filter_last_keyword
+        if self.table_filter_items_ref is items and last_keyword and last_keyword in keyword:
+            # Narrowing the keyword can only drop rows, so rescan the previous matches only
+            candidates = self.table_filter_last_indices
+        else:
+            candidates = range(len(items))
         if keyword:
-            visible = [table for table in self.table_all_items if keyword in table.lower()]
+            indices = [idx for idx in candidates if keyword in items[idx].lower()]
         else:
-            visible = list(self.table_all_items)
+            indices = list(candidates)
+        self.table_filter_items_ref = items
+        self.table_filter_last_keyword = keyword
+        self.table_filter_last_indices = indices
+        return indices
+
+    def _refresh_table_list_widget(self) -> None:
+        keyword = self.table_filter_keyword.get().strip().lower()
+        visible = [self.table_all_items[idx] for idx in self._filter_table_indices(keyword)]
 
         selected_set = set(self.selected_tables)
         self.table_list.delete(0, tk.END)
+        if visible:
+            self.table_list.insert(tk.END, *visible)
         for idx, table in enumerate(visible):
-            self.table_list.insert(tk.END, table)
             if table in selected_set:
                 self.table_list.selection_set(idx)
 
@@ -172,15 +212,35 @@ class DataMixin:
         self.table_filter_keyword.set("")
         self.table_list.delete(0, tk.END)
 
-    def _refresh_tables(self) -> None:
+    def _refresh_tables(self, live: bool = False) -> None:
         if len(self.selected_dbs) != 1:
             self.selected_tables = []
             self._clear_table_list()
             return
         db = self.selected_dbs[0]
-        threading.Thread(target=self._refresh_tables_async, args=(db,), daemon=True).start()
+        threading.Thread(target=self._refresh_tables_async, args=(db, live), daemon=True).start()
 
-    def _refresh_tables_async(self, db: str) -> None:
+    def _mysql_tables_key(self, conn: dict, db: str) -> tuple:
+        return (
+            str(conn.get("container", "")),
+            str(conn.get("user", "")),
+            str(conn.get("host", "")),
+            int(conn.get("port", 0) or 0),
+            db,
+        )
+
+    def _cached_mysql_tables(self, conn: dict, db: str) -> list[str] | None:
+        cached = self.mysql_tables_cache.get(self._mysql_tables_key(conn, db))
+        if cached is not None and time.monotonic() - cached[1] < self.mysql_tables_cache_ttl:
+            return list(cached[0])
+        return None
+
+    def _store_mysql_tables(self, conn: dict, db: str, tables: list[str]) -> None:
+        # An empty list is also what a failed query returns, so it is not cached
+        if tables:
+            self.mysql_tables_cache[self._mysql_tables_key(conn, db)] = (list(tables), time.monotonic())
+
+    def _refresh_tables_async(self, db: str, live: bool = False) -> None:
         mysql_cfg = {
             "container": self.mysql_container.get().strip(),
             "user": self.mysql_user.get().strip(),
@@ -188,17 +248,27 @@ class DataMixin:
         }
         source_uri = self.source_uri.get().strip()
         conn = resolve_mysql_conn({"mysql": mysql_cfg, "source": {"uri": source_uri}}, db)
-        tables = get_mysql_tables(
-            str(conn.get("container", "")),
-            str(conn.get("user", "")),
-            str(conn.get("password", "")),
-            db,
-            host=str(conn.get("host", "")),
-            port=int(conn.get("port", 0) or 0),
-        )
+        tables = None if live else self._cached_mysql_tables(conn, db)
+        if tables is None:
+            session = self._mysql_info_session(conn)
+            tables = session.list_tables(db) if session is not None else None
+            if tables is None:
+                self._drop_mysql_info_session(conn)
+                tables = get_mysql_tables(
+                    str(conn.get("container", "")),
+                    str(conn.get("user", "")),
+                    str(conn.get("password", "")),
+                    db,
+                    host=str(conn.get("host", "")),
+                    port=int(conn.get("port", 0) or 0),
+                )
+            self._store_mysql_tables(conn, db, tables)
         self.queue.put(("table_list", db, tables))
 
     def _refresh_databases(self) -> None:
+        # An explicit refresh should show live sizes and tables, not ones cached from before
+        self.db_size_cache.clear()
+        self.mysql_tables_cache.clear()
         threading.Thread(target=self._refresh_databases_async, daemon=True).start()
 
     def _refresh_databases_async(self) -> None:
@@ -219,13 +289,17 @@ class DataMixin:
             self.queue.put(("log", f"源库 URI 不是 mysql://，当前为 {parsed_source.get('scheme')}://，无法刷新 MySQL 源库列表。\n"))
         else:
             conn = resolve_mysql_conn({"mysql": mysql_cfg, "source": {"uri": source_uri}}, "mysql")
-            source_dbs = get_mysql_databases(
-                str(conn.get("container", "")),
-                str(conn.get("user", "")),
-                str(conn.get("password", "")),
-                host=str(conn.get("host", "")),
-                port=int(conn.get("port", 0) or 0),
-            )
+            session = self._mysql_info_session(conn)
+            source_dbs = session.list_databases() if session is not None else None
+            if source_dbs is None:
+                self._drop_mysql_info_session(conn)
+                source_dbs = get_mysql_databases(
+                    str(conn.get("container", "")),
+                    str(conn.get("user", "")),
+                    str(conn.get("password", "")),
+                    host=str(conn.get("host", "")),
+                    port=int(conn.get("port", 0) or 0),
+                )
         if not source_dbs:
             source_dbs = list(self.fallback_databases)
 
@@ -259,14 +333,19 @@ class DataMixin:
             ))
         self.queue.put(("log", f"已刷新数据库：源库 {len(source_dbs)} 个，目标库 {len(target_dbs)} 个\n"))
 
-    def _refresh_db_info(self) -> None:
+    def _refresh_db_info(self, tick: bool = False) -> None:
         if not self.selected_dbs:
             return
-        dbs = list(self.selected_dbs)
-        threading.Thread(target=self._refresh_db_info_async, args=(dbs,), daemon=True).start()
-        self.info_refresh_after_id = self.after(5000, self._refresh_db_info)
-
-    def _refresh_db_info_async(self, dbs: list[str]) -> None:
+        # A timer tick leaves a slow refresh running so its results still land
+        thread = self.db_info_thread
+        if not (tick and thread is not None and thread.is_alive()):
+            dbs = list(self.selected_dbs)
+            thread = threading.Thread(target=self._refresh_db_info_async, args=(dbs, self.db_info_token), daemon=True)
+            self.db_info_thread = thread
+            thread.start()
+        self.info_refresh_after_id = self.after(5000, self._refresh_db_info, True)
+
+    def _refresh_db_info_async(self, dbs: list[str], token: int = 0) -> None:
         target_lines: list[str] = []
 
         if self.source_type.get().strip() != "mysql":
@@ -279,46 +358,44 @@ class DataMixin:
             }
             source_uri = self.source_uri.get().strip()
             total_bytes = 0
-            total_tables = 0
+            now = time.monotonic()
+            misses: dict[tuple, tuple[dict, list[str]]] = {}
             for db in dbs:
                 conn = resolve_mysql_conn({"mysql": mysql_cfg, "source": {"uri": source_uri}}, db)
-                cmd = [
-                    "docker",
-                    "exec",
+                conn_key = (
                     str(conn.get("container", "")),
-                    "mysql",
-                    f"-u{str(conn.get('user', ''))}",
-                    f"-p{str(conn.get('password', ''))}",
-                    "-N",
-                ]
-                host = str(conn.get("host", ""))
-                port = int(conn.get("port", 0) or 0)
-                if host:
-                    cmd.extend(["-h", host])
-                if port:
-                    cmd.extend(["-P", str(port)])
-                cmd.extend([
-                    "-e",
-                    (
-                        "SELECT COUNT(*), COALESCE(SUM(data_length + index_length), 0) "
-                        f"FROM information_schema.tables WHERE table_schema='{db}';"
-                    ),
-                ])
-                result = run_command(cmd)
-                if result.returncode != 0:
+                    str(conn.get("user", "")),
+                    str(conn.get("host", "")),
+                    int(conn.get("port", 0) or 0),
+                )
+                cached = self.db_size_cache.get(conn_key + (db,))
+                if cached is not None and now - cached[1] < self.db_size_cache_ttl:
+                    total_bytes += cached[0]
                     continue
-                output = (result.stdout or "").strip().splitlines()
-                if not output:
+                misses.setdefault(conn_key, (conn, []))[1].append(db)
+            # One information_schema round trip per MySQL endpoint instead of one per database
+            for conn_key, (conn, group_dbs) in misses.items():
+                if token and token != self.db_info_token:
+                    return
+                session = self._mysql_info_session(conn)
+                sizes = session.db_sizes_bulk(group_dbs) if session is not None else None
+                if sizes is None:
+                    self._drop_mysql_info_session(conn)
+                    sizes = get_db_sizes_bulk(
+                        str(conn.get("container", "")),
+                        str(conn.get("user", "")),
+                        str(conn.get("password", "")),
+                        group_dbs,
+                        host=str(conn.get("host", "")),
+                        port=int(conn.get("port", 0) or 0),
+                    )
+                if sizes is None:
                     continue
-                parts = output[0].split("\t")
-                if len(parts) >= 2:
-                    try:
-                        count = int(parts[0])
-                        size = int(parts[1])
-                        total_tables += count
-                        total_bytes += size
-                    except ValueError:
-                        pass
+                for db, size in sizes.items():
+                    total_bytes += size
+                    self.db_size_cache[conn_key + (db,)] = (size, now)
+            if token and token != self.db_info_token:
+                return
             self.queue.put(("size", total_bytes))
 
         target_cfg = {
@@ -327,73 +404,110 @@ class DataMixin:
         }
         target_parsed_ok = True
         try:
-            parse_db_uri(target_cfg["uri"].replace("{{DB_NAME}}", dbs[0]))
+            parse_db_uri(fill_db_uri(target_cfg["uri"], dbs[0]))
         except Exception:
             target_parsed_ok = False
 
         if not target_parsed_ok:
             target_lines.append("目标 URI 无效，无法实时统计")
         else:
-            for db in dbs:
-                target_lines.append(f"[{db}]")
-                target_uri = target_cfg["uri"].replace("{{DB_NAME}}", db)
+            # COPY returns the bare row through both the psycopg and the psql path
+            sql = (
+                "COPY (SELECT COUNT(*)::text || '|' || "
+                "COALESCE(SUM(pg_total_relation_size(to_regclass(quote_ident(schemaname)||'.'||quote_ident(tablename)))),0)::text "
+                "FROM pg_tables WHERE schemaname='public') TO STDOUT;"
+            )
+
+            def target_stats(db: str) -> list[str]:
+                if token and token != self.db_info_token:
+                    return []
+                lines = [f"[{db}]"]
+                target_uri = fill_db_uri(target_cfg["uri"], db)
                 target = parse_db_uri(target_uri)
-                psql_container = target_cfg.get("psql_container", "postgres16")
-                sql = (
-                    "SELECT COUNT(*)::text || '|' || "
-                    "COALESCE(SUM(pg_total_relation_size(to_regclass(quote_ident(schemaname)||'.'||quote_ident(tablename)))),0)::text "
-                    "FROM pg_tables WHERE schemaname='public';"
-                )
-                cmd = [
-                    "docker",
-                    "exec",
-                    "-e",
-                    f"PGPASSWORD={target.get('password', '')}",
-                    psql_container,
-                    "psql",
-                    "-h",
-                    str(target.get("host", "")),
-                    "-p",
-                    str(target.get("port", 5432) or 5432),
-                    "-U",
-                    str(target.get("user", "")),
-                    "-d",
-                    str(target.get("database", "")),
-                    "-t",
-                    "-A",
-                    "-v",
-                    "ON_ERROR_STOP=1",
-                    "-c",
-                    sql,
-                ]
-                result = run_command(cmd)
-                if result.returncode != 0:
-                    target_lines.append("- 连接失败或查询失败")
-                    target_lines.append("")
-                    continue
-                text = (result.stdout or "").strip()
+                # Shares the connect timeout and host fallback of the sync path, so an
+                # unreachable target fails in seconds instead of stalling the refresh
+                code, output = run_psql_container_sql(target, target_cfg, sql)
+                if code != 0:
+                    lines.append("- 连接失败或查询失败")
+                    lines.append("")
+                    return lines
+                text = output.strip()
                 if not text or "|" not in text:
-                    target_lines.append("- 无统计数据")
-                    target_lines.append("")
-                    continue
+                    lines.append("- 无统计数据")
+                    lines.append("")
+                    return lines
                 count_str, size_str = text.split("|", 1)
                 try:
                     count = int(count_str.strip())
                     size = int(size_str.strip())
-                    target_lines.append(f"- public 表数量: {count}")
-                    target_lines.append(f"- public 数据量: {self._format_size(size)}")
+                    lines.append(f"- public 表数量: {count}")
+                    lines.append(f"- public 数据量: {self._format_size(size)}")
                 except ValueError:
-                    target_lines.append("- 统计解析失败")
-                target_lines.append("")
-
+                    lines.append("- 统计解析失败")
+                lines.append("")
+                return lines
+
+            # Each target database needs its own psql connection; overlap the docker exec round trips
+            if len(dbs) > 1:
+                from concurrent.futures import ThreadPoolExecutor
+
+                with ThreadPoolExecutor(max_workers=min(8, len(dbs))) as executor:
+                    for lines in executor.map(target_stats, dbs):
+                        target_lines.extend(lines)
+            else:
+                for db in dbs:
+                    target_lines.extend(target_stats(db))
+
+        if token and token != self.db_info_token:
+            return
         self.queue.put(("target_info", "\n".join(target_lines).strip() or "无数据"))
 
+    def _mysql_info_session_key(self, conn: dict) -> tuple:
+        return (
+            str(conn.get("container", "")),
+            str(conn.get("user", "")),
+            str(conn.get("password", "")),
+            str(conn.get("host", "")),
+            int(conn.get("port", 0) or 0),
+        )
+
+    def _mysql_info_session(self, conn: dict) -> MysqlSession | None:
+        # Database list, table list and the size panel (which refreshes every few
+        # seconds) share one mysql client per endpoint instead of a docker exec each
+        key = self._mysql_info_session_key(conn)
+        running = running_containers()
+        if running is not None and key[0] not in running:
+            # Not cached: the one-shot helpers report the error, and a later
+            # call opens the session once the container is up
+            return None
+        with self.mysql_info_sessions_lock:
+            if key not in self.mysql_info_sessions:
+                try:
+                    self.mysql_info_sessions[key] = MysqlSession(*key)
+                except OSError:
+                    self.mysql_info_sessions[key] = None
+            return self.mysql_info_sessions[key]
+
+    def _reset_db_info_cache(self) -> None:
+        self.db_size_cache.clear()
+        self.mysql_tables_cache.clear()
+        with self.mysql_info_sessions_lock:
+            sessions = list(self.mysql_info_sessions.values())
+            self.mysql_info_sessions.clear()
+        for session in sessions:
+            if session is not None:
+                session.close()
+
+    def _drop_mysql_info_session(self, conn: dict) -> None:
+        with self.mysql_info_sessions_lock:
+            session = self.mysql_info_sessions.pop(self._mysql_info_session_key(conn), None)
+        if session is not None:
+            session.close()
+
     def _format_size(self, num_bytes: int) -> str:
         if num_bytes < 1024:
             return f"{num_bytes} B"
-        for unit in ["KB", "MB", "GB", "TB"]:
-            num_bytes /= 1024
-            if num_bytes < 1024:
-                return f"{num_bytes:.2f} {unit}"
-        return f"{num_bytes:.2f} PB"
+        # Each unit is 10 bits; bit_length picks it without repeated division
+        idx = min((num_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f"{num_bytes / (1 << (10 * idx)):.2f} {_SIZE_UNITS[idx]}"
 
@@ -7,14 +7,14 @@ import threading
 import time
 import tkinter as tk
 from collections import deque
-from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
-from tkinter import filedialog, messagebox, ttk
+from tkinter import messagebox, ttk
 
 from pgloader_gui_core import (
     DEFAULT_CONFIG,
     SOURCE_TYPES,
     SYNC_HISTORY_FILE,
     URI_HISTORY_FILE,
+    MysqlSession,
     build_datax_command,
     build_datax_job,
     build_mysql_uri_from_conn,
@@ -29,14 +29,18 @@ from pgloader_gui_core import (
     clear_target_public_table_data,
     clear_target_public_tables,
     clear_target_public_views,
+    copy_config,
     ensure_target_primary_keys,
     filter_tables_by_selected,
+    fill_db_uri,
     get_mysql_columns,
     get_mysql_databases,
     get_mysql_split_pk,
     get_mysql_tables,
     get_target_databases,
+    get_db_sizes_bulk,
     get_total_tables,
+    get_total_tables_bulk,
     is_cleanup_jobs_on_finish,
     is_datax_jvm_oom,
     is_datax_key_log,
@@ -47,10 +51,13 @@ from pgloader_gui_core import (
     parse_db_uri,
     parse_selected_tables,
     patch_rendered_load_for_full_sync,
+    read_template,
     render_load_file,
     resolve_datax_home,
     resolve_mysql_conn,
     run_command,
+    run_psql_container_sql,
+    running_containers,
     save_config,
     should_skip_table,
     sync_views_for_db,
@@ -59,7 +66,7 @@ from pgloader_gui_core import (
 
 class HistoryMixin:
     def _load_sync_history_records(self) -> None:
-        self.sync_history_records = []
+        self.sync_history_records.clear()
         if not os.path.isfile(self.sync_history_path):
             self._refresh_history_tree()
             return
@@ -67,9 +74,9 @@ class HistoryMixin:
             with open(self.sync_history_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
             if isinstance(data, list):
-                self.sync_history_records = [item for item in data if isinstance(item, dict)]
+                self.sync_history_records.extend(item for item in data[:1000] if isinstance(item, dict))
         except Exception:
-            self.sync_history_records = []
+            self.sync_history_records.clear()
         self._refresh_history_tree()
 
     def _load_uri_history_records(self) -> None:
@@ -166,12 +173,12 @@ class HistoryMixin:
             regroup_history()
 
             pg_listbox.delete(0, tk.END)
-            for item in grouped["pg"]:
-                pg_listbox.insert(tk.END, item)
+            if grouped["pg"]:
+                pg_listbox.insert(tk.END, *grouped["pg"])
 
             other_listbox.delete(0, tk.END)
-            for item in grouped["other"]:
-                other_listbox.insert(tk.END, item)
+            if grouped["other"]:
+                other_listbox.insert(tk.END, *grouped["other"])
 
             if select_key == "pg" and grouped["pg"]:
                 idx = max(0, min(select_index, len(grouped["pg"]) - 1))
@@ -249,7 +256,7 @@ class HistoryMixin:
     def _save_sync_history_records(self) -> None:
         try:
             with open(self.sync_history_path, "w", encoding="utf-8") as f:
-                json.dump(self.sync_history_records, f, ensure_ascii=False, indent=2)
+                json.dump(list(self.sync_history_records), f, ensure_ascii=False, indent=2)
         except Exception:
             pass
 
@@ -282,31 +289,40 @@ class HistoryMixin:
             "result": result,
             "duration_seconds": duration_seconds,
         }
-        self.sync_history_records.insert(0, new_item)
-        if len(self.sync_history_records) > 1000:
-            self.sync_history_records = self.sync_history_records[:1000]
+        # Bounded deque drops the oldest record on its own
+        self.sync_history_records.appendleft(new_item)
         self._save_sync_history_records()
-        self._refresh_history_tree()
+        if not hasattr(self, "history_tree"):
+            return
+        # Only the new row changes; rebuilding all 1000 rows per record is wasted work
+        self._insert_history_row(new_item, 0)
+        overflow = self.history_tree.get_children()[len(self.sync_history_records):]
+        if overflow:
+            self.history_tree.delete(*overflow)
+
+    def _insert_history_row(self, item: dict, index: int | str = tk.END) -> None:
+        duration_text = self._format_duration_text(float(item.get("duration_seconds", 0) or 0))
+        self.history_tree.insert(
+            "",
+            index,
+            values=(
+                str(item.get("source_db", "") or ""),
+                str(item.get("target_db", "") or ""),
+                str(item.get("sync_time", "") or ""),
+                str(item.get("result", "") or ""),
+                duration_text,
+            ),
+        )
 
     def _refresh_history_tree(self) -> None:
         if not hasattr(self, "history_tree"):
             return
-        for item_id in self.history_tree.get_children():
-            self.history_tree.delete(item_id)
+        children = self.history_tree.get_children()
+        if children:
+            self.history_tree.delete(*children)
 
         for item in self.sync_history_records:
-            duration_text = self._format_duration_text(float(item.get("duration_seconds", 0) or 0))
-            self.history_tree.insert(
-                "",
-                tk.END,
-                values=(
-                    str(item.get("source_db", "") or ""),
-                    str(item.get("target_db", "") or ""),
-                    str(item.get("sync_time", "") or ""),
-                    str(item.get("result", "") or ""),
-                    duration_text,
-                ),
-            )
+            self._insert_history_row(item)
 
     def _clear_sync_history(self) -> None:
         if not self.sync_history_records and not os.path.isfile(self.sync_history_path):
@@ -317,7 +333,7 @@ class HistoryMixin:
         if not ok:
             return
 
-        self.sync_history_records = []
+        self.sync_history_records.clear()
         try:
             if os.path.isfile(self.sync_history_path):
                 os.remove(self.sync_history_path)
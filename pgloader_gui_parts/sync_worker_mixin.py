@@ -1,15 +1,111 @@
+import functools
 import os
 import re
 import subprocess
 import threading
 import time
-from collections import deque
-from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
 from pgloader_gui_core import *
+
+
+@functools.lru_cache(maxsize=256)
+def _table_line_re(db: str) -> re.Pattern:
+    # Summary rows look like "<db>.<table>  <errors>  <rows> ..."; ASCII classes
+    # skip the Unicode tables and still let \S cover non-ASCII table names
+    return re.compile(rf"^\s*{re.escape(db)}\.\S+\s+\d+\s+\d+", re.ASCII)
+
+
 class SyncWorkerMixin:
     def _worker(self, config: dict, mode: str) -> None:
+        # concurrent.futures pulls in logging; only pay for it once a sync starts
+        from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+
+        mysql_sessions: dict[tuple, MysqlSession | None] = {}
+        mysql_sessions_lock = threading.Lock()
+
+        def mysql_session_for(mysql_conn: dict) -> MysqlSession | None:
+            key = (
+                str(mysql_conn.get("container", "")),
+                str(mysql_conn.get("user", "")),
+                str(mysql_conn.get("password", "")),
+                str(mysql_conn.get("host", "")),
+                int(mysql_conn.get("port", 0) or 0),
+            )
+            running = running_containers()
+            if running is not None and key[0] not in running:
+                return None
+            with mysql_sessions_lock:
+                if key not in mysql_sessions:
+                    try:
+                        session = MysqlSession(*key)
+                    except OSError:
+                        session = None
+                    else:
+                        # Stop terminates it like any other child, so a query blocked
+                        # on it returns at once and the worker falls through
+                        self.active_processes.add(session.process)
+                    mysql_sessions[key] = session
+                return mysql_sessions[key]
+
+        schema_bundles: dict[str, dict[str, dict]] = {}
+
+        def schema_bundle_for(mysql_conn: dict, db: str) -> dict[str, dict] | None:
+            # Columns and primary keys of a whole schema, fetched once per run and
+            # shared by the primary key phase and the DataX job builder
+            bundle = schema_bundles.get(db)
+            if bundle is not None:
+                return bundle
+            session = mysql_session_for(mysql_conn)
+            bundle = session.schema_bundle(db) if session is not None else None
+            if bundle is None:
+                bundle = get_mysql_schema_bundle(
+                    str(mysql_conn.get("container", "")),
+                    str(mysql_conn.get("user", "")),
+                    str(mysql_conn.get("password", "")),
+                    db,
+                    host=str(mysql_conn.get("host", "")),
+                    port=int(mysql_conn.get("port", 0) or 0),
+                )
+            if bundle is not None:
+                schema_bundles[db] = bundle
+            return bundle
+
+        def ensure_primary_keys(db: str) -> tuple[int, str]:
+            bundle = schema_bundle_for(resolve_mysql_conn(config, db), db)
+            pk_map = None
+            if bundle is not None:
+                pk_map = {table: meta.get("primary_key") for table, meta in bundle.items() if meta.get("primary_key")}
+            return ensure_target_primary_keys(db, config, selected_tables=selected_tables, pk_map=pk_map)
+
+        def list_mysql_tables(mysql_conn: dict, db: str) -> list[str]:
+            # The pre-count, structure and data phases all ask for the same table list
+            tables = self._cached_mysql_tables(mysql_conn, db)
+            if tables is not None:
+                return tables
+            session = mysql_session_for(mysql_conn)
+            tables = session.list_tables(db) if session is not None else None
+            if tables is None:
+                tables = get_mysql_tables(
+                    str(mysql_conn.get("container", "")),
+                    str(mysql_conn.get("user", "")),
+                    str(mysql_conn.get("password", "")),
+                    db,
+                    host=str(mysql_conn.get("host", "")),
+                    port=int(mysql_conn.get("port", 0) or 0),
+                )
+            self._store_mysql_tables(mysql_conn, db, tables)
+            return tables
+
         try:
             cleanup_datax_logs_by_retention(self.workspace, config.get("datax", {}))
+            # One docker ps up front instead of discovering a stopped container
+            # through a failing docker exec per query
+            running = running_containers(max_age=0)
+            if running is not None:
+                needed = {(config.get("target", {}).get("psql_container") or "postgres16").strip()}
+                if config.get("source", {}).get("type", "mysql") == "mysql":
+                    needed.update(str(resolve_mysql_conn(config, db).get("container", "")) for db in config["databases"])
+                for name in sorted(name for name in needed if name and name not in running):
+                    self.queue.put(("log", f"警告：docker 中未找到运行中的容器 {name}\n"))
             self.overall_total_tables = 0
             self.overall_processed_tables = 0
             total_dbs = len(config["databases"])
@@ -17,31 +113,49 @@ class SyncWorkerMixin:
             if selected_tables and total_dbs != 1:
                 self.queue.put(("failed", "选择单表/多表迁移时，只能选择一个数据库。\n"))
                 return
-            if mode in ("structure", "full"):
+            table_counts: dict[str, int] = {}
+            if mode in ("structure", "full") and config.get("source", {}).get("type", "mysql") == "mysql":
+                count_groups: dict[tuple, list[str]] = {}
                 for db in config["databases"]:
-                    if config.get("source", {}).get("type", "mysql") != "mysql":
-                        continue
                     mysql_conn = resolve_mysql_conn(config, db)
                     if selected_tables:
-                        all_tables = get_mysql_tables(
-                            str(mysql_conn.get("container", "")),
-                            str(mysql_conn.get("user", "")),
-                            str(mysql_conn.get("password", "")),
-                            db,
-                            host=str(mysql_conn.get("host", "")),
-                            port=int(mysql_conn.get("port", 0) or 0),
-                        )
+                        all_tables = list_mysql_tables(mysql_conn, db)
                         selected_found, _ = filter_tables_by_selected(all_tables, selected_tables)
                         self.overall_total_tables += len(selected_found)
                     else:
-                        self.overall_total_tables += get_total_tables(
+                        conn_key = (
                             str(mysql_conn.get("container", "")),
                             str(mysql_conn.get("user", "")),
                             str(mysql_conn.get("password", "")),
-                            db,
-                            host=str(mysql_conn.get("host", "")),
-                            port=int(mysql_conn.get("port", 0) or 0),
+                            str(mysql_conn.get("host", "")),
+                            int(mysql_conn.get("port", 0) or 0),
                         )
+                        count_groups.setdefault(conn_key, []).append(db)
+                def count_group(conn_key: tuple, group_dbs: list[str]) -> dict[str, int]:
+                    container, user, password, host, port = conn_key
+                    session = mysql_session_for({
+                        "container": container,
+                        "user": user,
+                        "password": password,
+                        "host": host,
+                        "port": port,
+                    })
+                    group_counts = session.count_tables_bulk(group_dbs) if session is not None else None
+                    if group_counts is None:
+                        group_counts = get_total_tables_bulk(container, user, password, group_dbs, host=host, port=port)
+                    return group_counts
+
+                if len(count_groups) > 1:
+                    # Each group is a separate MySQL endpoint; the lookups only wait on docker/MySQL
+                    with ThreadPoolExecutor(max_workers=min(8, len(count_groups))) as executor:
+                        for group_counts in executor.map(lambda item: count_group(*item), count_groups.items()):
+                            table_counts.update(group_counts)
+                else:
+                    for conn_key, group_dbs in count_groups.items():
+                        table_counts.update(count_group(conn_key, group_dbs))
+                self.overall_total_tables += sum(table_counts.get(db, 0) for db in config["databases"])
+            source_uri_cfg = config.get("source", {}).get("uri", "")
+            target_uri_cfg = config.get("target", {}).get("uri", "")
             if mode == "full":
                 execution_items = []
                 for db in config["databases"]:
@@ -55,11 +169,16 @@ class SyncWorkerMixin:
                 execution_items = [(db, "view") for db in config["databases"]]
             else:
                 execution_items = [(db, "data") for db in config["databases"]]
-            for db, phase in execution_items:
+            parallel = max(1, int(config.get("pgloader", {}).get("parallel", 1) or 1))
+            run_parallel = parallel > 1 and total_dbs > 1
+            self.run_parallel = run_parallel
+            progress_lock = threading.Lock()
+
+            def run_phase(db: str, phase: str, emit) -> bool:
                 idx = config["databases"].index(db) + 1
                 if self.stop_event.is_set():
-                    self.queue.put(("stopped",))
-                    return
+                    emit(("stopped",))
+                    return False
                 if mode == "full":
                     if phase == "structure":
                         phase_name = "结构同步"
@@ -69,20 +188,20 @@ class SyncWorkerMixin:
                         phase_name = "视图同步"
                     else:
                         phase_name = "数据同步"
-                    self.queue.put(("log", f"\n>>>> 全同步阶段：{db} - {phase_name} <<<<\n"))
+                    emit(("log", f"\n>>>> 全同步阶段：{db} - {phase_name} <<<<\n"))
                 db_start_time = time.time()
                 def push_db_history(result: str) -> None:
                     target_db = ""
                     target_uri = config.get("target", {}).get("uri", "")
                     if isinstance(target_uri, str) and target_uri.strip():
                         try:
-                            parsed = parse_db_uri(target_uri.replace("{{DB_NAME}}", db))
+                            parsed = parse_db_uri(fill_db_uri(target_uri, db))
                             target_db = str(parsed.get("database", "") or "")
                         except Exception:
                             target_db = ""
                     duration_seconds = max(0.0, time.time() - db_start_time)
                     sync_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(db_start_time))
-                    self.queue.put((
+                    emit((
                         "history",
                         {
                             "source_db": db,
@@ -100,58 +219,44 @@ class SyncWorkerMixin:
                     title = "视图同步"
                 else:
                     title = "数据同步"
-                self.queue.put(("log", f"===============================\n开始{title}数据库: {db}\n===============================\n"))
+                emit(("log", f"===============================\n开始{title}数据库: {db}\n===============================\n"))
                 if phase == "structure":
                     if bool(config.get("pgloader", {}).get("clear_public_before_sync", True)):
                         if selected_tables:
-                            self.queue.put(("log", f"清理目标库选中表: {db}，tables={len(selected_tables)}\n"))
+                            emit(("log", f"清理目标库选中表: {db}，tables={len(selected_tables)}\n"))
                         else:
-                            self.queue.put(("log", f"清理目标库 public 表: {db}\n"))
+                            emit(("log", f"清理目标库 public 表: {db}\n"))
                         clear_code, clear_output = clear_target_public_tables(db, config, selected_tables=selected_tables)
                         if clear_output:
-                            self.queue.put(("log", clear_output + ("" if clear_output.endswith("\n") else "\n")))
+                            emit(("log", clear_output + ("" if clear_output.endswith("\n") else "\n")))
                         if clear_code != 0:
                             push_db_history("失败")
-                            self.queue.put(("failed", f"清理目标库 public 表失败: {db}\n"))
-                            return
+                            emit(("failed", f"清理目标库 public 表失败: {db}\n"))
+                            return False
                     mysql_conn = resolve_mysql_conn(config, db)
                     source_type = config.get("source", {}).get("type", "mysql")
                     total_tables = 0
                     table_filter_clause = ""
                     if source_type == "mysql":
                         if selected_tables:
-                            all_tables = get_mysql_tables(
-                                str(mysql_conn.get("container", "")),
-                                str(mysql_conn.get("user", "")),
-                                str(mysql_conn.get("password", "")),
-                                db,
-                                host=str(mysql_conn.get("host", "")),
-                                port=int(mysql_conn.get("port", 0) or 0),
-                            )
+                            all_tables = list_mysql_tables(mysql_conn, db)
                             selected_found, missing_tables = filter_tables_by_selected(all_tables, selected_tables)
                             if missing_tables:
-                                self.queue.put(("log", f"选中表在 {db} 中不存在: {', '.join(missing_tables)}\n"))
+                                emit(("log", f"选中表在 {db} 中不存在: {', '.join(missing_tables)}\n"))
                             if not selected_found:
                                 push_db_history("失败")
-                                self.queue.put(("failed", f"未找到可迁移表: {db}\n"))
-                                return
+                                emit(("failed", f"未找到可迁移表: {db}\n"))
+                                return False
                             total_tables = len(selected_found)
                             table_filter_clause = build_pgloader_table_filter_clause(selected_found)
                         else:
-                            total_tables = get_total_tables(
-                                str(mysql_conn.get("container", "")),
-                                str(mysql_conn.get("user", "")),
-                                str(mysql_conn.get("password", "")),
-                                db,
-                                host=str(mysql_conn.get("host", "")),
-                                port=int(mysql_conn.get("port", 0) or 0),
-                            )
-                    source_uri = normalize_db_uri(config.get("source", {}).get("uri", "").replace("{{DB_NAME}}", db))
+                            total_tables = table_counts.get(db, 0)
+                    source_uri = normalize_db_uri(fill_db_uri(source_uri_cfg, db))
                     if source_type == "mysql":
                         source_uri = build_mysql_uri_from_conn(mysql_conn, db)
-                    target_uri = normalize_db_uri(config.get("target", {}).get("uri", "").replace("{{DB_NAME}}", db))
-                    self.queue.put(("log", f"结构同步源URI: {mask_uri_password(source_uri)}\n"))
-                    self.queue.put(("log", f"结构同步目标URI: {mask_uri_password(target_uri)}\n"))
+                    target_uri = normalize_db_uri(fill_db_uri(target_uri_cfg, db))
+                    emit(("log", f"结构同步源URI: {mask_uri_password(source_uri)}\n"))
+                    emit(("log", f"结构同步目标URI: {mask_uri_password(target_uri)}\n"))
                     template_path = os.path.join(self.workspace, config["load_template"])
                     rendered_name = f".pgloader_rendered_{db}.load"
                     rendered_path = os.path.join(self.workspace, rendered_name)
@@ -167,10 +272,10 @@ class SyncWorkerMixin:
                             "TARGET_URI": target_uri,
                             "TABLE_FILTER": table_filter_clause,
                         },
+                        no_foreign_keys=mode == "full",
                     )
                     if mode == "full":
-                        patch_rendered_load_for_full_sync(rendered_path)
-                        self.queue.put(("log", "全同步结构阶段：已禁用外键创建，按 结构->主键->视图->数据 顺序执行。\n"))
+                        emit(("log", "全同步结构阶段：已禁用外键创建，按 结构->主键->视图->数据 顺序执行。\n"))
                     cmd = build_pgloader_command(
                         workspace=self.workspace,
                         load_file=rendered_name,
@@ -179,41 +284,71 @@ class SyncWorkerMixin:
                     )
                     show_output = bool(config["pgloader"].get("show_output", False))
                     processed = 0
-                    tail = deque(maxlen=200)
-                    table_line = re.compile(rf"^\s*{re.escape(db)}\.\S+\s+\d+\s+\d+")
+                    tail = OutputTail()
+                    table_line_match = _table_line_re(db).match
+                    table_prefix = f"{db}."
+                    table_marker = table_prefix.encode("utf-8")
                     has_log_error = False
+                    last_progress_emit = 0.0
+                    progress_pending = False
                     process = subprocess.Popen(
                         cmd,
                         stdout=subprocess.PIPE,
                         stderr=subprocess.STDOUT,
-                        text=True,
-                        encoding="utf-8",
-                        errors="replace",
+                        bufsize=0,
                         cwd=self.workspace,
                     )
                     self.current_process = process
+                    self.active_processes.add(process)
+                    stop_is_set = self.stop_event.is_set
+                    queue_put = emit
+                    monotonic = time.monotonic
+
+                    def put_progress() -> None:
+                        with progress_lock:
+                            overall_processed = self.overall_processed_tables
+                        queue_put(("progress", db, processed, total_tables, idx, total_dbs, overall_processed, self.overall_total_tables))
                     try:
-                        assert process.stdout is not None
-                        for line in process.stdout:
-                            if self.stop_event.is_set():
+                        for data, lines in self._stream_process_output(process, emit, tail, show_output):
+                            if stop_is_set():
                                 try:
                                     process.terminate()
                                 except Exception:
                                     pass
                                 push_db_history("已停止")
-                                self.queue.put(("stopped",))
-                                return
-                            tail.append(line)
-                            if show_output:
-                                self.queue.put(("log", line))
-                            if is_pgloader_error_log(line):
-                                has_log_error = True
-                            if table_line.match(line):
-                                processed += 1
-                                self.overall_processed_tables += 1
-                                self.queue.put(("progress", db, processed, total_tables, idx, total_dbs, self.overall_processed_tables, self.overall_total_tables))
+                                queue_put(("stopped",))
+                                return False
+                            check_errors = not has_log_error and has_pgloader_error_marker(data)
+                            # Most chunks are neither error output nor summary rows; skip the line scan for those
+                            check_tables = table_marker in data
+                            if not (check_errors or check_tables):
+                                continue
+                            chunk_tables = 0
+                            for line in lines:
+                                if check_errors and is_pgloader_error_log(line):
+                                    has_log_error = True
+                                    check_errors = False
+                                # Only lines carrying "<db>." can be summary rows; skip the regex for the rest
+                                if check_tables and table_prefix in line and table_line_match(line):
+                                    chunk_tables += 1
+                            # Rows read together arrive together; one progress event covers the whole chunk
+                            if chunk_tables:
+                                processed += chunk_tables
+                                with progress_lock:
+                                    self.overall_processed_tables += chunk_tables
+                                # At most one progress event per 50ms, except the one that completes the database
+                                now = monotonic()
+                                if processed == total_tables or now - last_progress_emit > 0.05:
+                                    last_progress_emit = now
+                                    progress_pending = False
+                                    put_progress()
+                                else:
+                                    progress_pending = True
+                        if progress_pending:
+                            put_progress()
                         code = process.wait()
                     finally:
+                        self.active_processes.discard(process)
                         if cleanup_pgloader_temp:
                             cleanup_pgloader_rendered_file(rendered_path)
                     if has_log_error:
@@ -221,154 +356,160 @@ class SyncWorkerMixin:
                     self.current_process = None
                     if code != 0:
                         push_db_history("失败")
-                        self.queue.put(("error", db, list(tail)))
-                        return
+                        emit(("error", db, tail.lines()))
+                        return False
                     ensure_pk_enabled = bool(config.get("pgloader", {}).get("ensure_primary_keys", True))
                     if ensure_pk_enabled and mode != "full":
-                        pk_code, pk_output = ensure_target_primary_keys(db, config, selected_tables=selected_tables)
+                        pk_code, pk_output = ensure_primary_keys(db)
                         if pk_output:
-                            self.queue.put(("log", pk_output + ("" if pk_output.endswith("\n") else "\n")))
+                            emit(("log", pk_output + ("" if pk_output.endswith("\n") else "\n")))
                         if pk_code != 0:
                             push_db_history("失败")
-                            self.queue.put(("failed", f"补主键失败: {db}\n"))
-                            return
+                            emit(("failed", f"补主键失败: {db}\n"))
+                            return False
                     sync_views_enabled = bool(config.get("pgloader", {}).get("sync_views", True))
                     if sync_views_enabled and mode != "full":
                         view_code, view_output = sync_views_for_db(db, config)
                         if view_output:
-                            self.queue.put(("log", view_output + ("" if view_output.endswith("\n") else "\n")))
+                            emit(("log", view_output + ("" if view_output.endswith("\n") else "\n")))
                         if view_code != 0:
                             push_db_history("失败")
-                            self.queue.put(("failed", f"同步视图失败: {db}\n"))
-                            return
+                            emit(("failed", f"同步视图失败: {db}\n"))
+                            return False
                     push_db_history("成功")
-                    self.queue.put(("log", f"结构同步成功: {db}\n"))
-                    self.queue.put(("phase_done",))
+                    emit(("log", f"结构同步成功: {db}\n"))
+                    emit(("phase_done",))
                 elif phase == "primary_key":
                     ensure_pk_enabled = bool(config.get("pgloader", {}).get("ensure_primary_keys", True))
                     if ensure_pk_enabled:
-                        pk_code, pk_output = ensure_target_primary_keys(db, config, selected_tables=selected_tables)
+                        pk_code, pk_output = ensure_primary_keys(db)
                         if pk_output:
-                            self.queue.put(("log", pk_output + ("" if pk_output.endswith("\n") else "\n")))
+                            emit(("log", pk_output + ("" if pk_output.endswith("\n") else "\n")))
                         if pk_code != 0:
                             push_db_history("失败")
-                            self.queue.put(("failed", f"补主键失败: {db}\n"))
-                            return
+                            emit(("failed", f"补主键失败: {db}\n"))
+                            return False
                     push_db_history("成功")
-                    self.queue.put(("log", f"主键同步成功: {db}\n"))
-                    self.queue.put(("phase_done",))
+                    emit(("log", f"主键同步成功: {db}\n"))
+                    emit(("phase_done",))
                 elif phase == "view":
                     if bool(config.get("pgloader", {}).get("clear_public_views_before_view_sync", False)):
                         clear_view_code, clear_view_output = clear_target_public_views(db, config)
                         if clear_view_output:
-                            self.queue.put(("log", clear_view_output + ("" if clear_view_output.endswith("\n") else "\n")))
+                            emit(("log", clear_view_output + ("" if clear_view_output.endswith("\n") else "\n")))
                         if clear_view_code != 0:
                             push_db_history("失败")
-                            self.queue.put(("failed", f"清理目标库视图失败: {db}\n"))
-                            return
+                            emit(("failed", f"清理目标库视图失败: {db}\n"))
+                            return False
                     sync_views_enabled = bool(config.get("pgloader", {}).get("sync_views", True))
                     if sync_views_enabled:
                         view_code, view_output = sync_views_for_db(db, config)
                         if view_output:
-                            self.queue.put(("log", view_output + ("" if view_output.endswith("\n") else "\n")))
+                            emit(("log", view_output + ("" if view_output.endswith("\n") else "\n")))
                         if view_code != 0:
                             push_db_history("失败")
-                            self.queue.put(("failed", f"同步视图失败: {db}\n"))
-                            return
+                            emit(("failed", f"同步视图失败: {db}\n"))
+                            return False
                     push_db_history("成功")
-                    self.queue.put(("log", f"视图同步成功: {db}\n"))
-                    self.queue.put(("phase_done",))
+                    emit(("log", f"视图同步成功: {db}\n"))
+                    emit(("phase_done",))
                 else:
                     if bool(config.get("pgloader", {}).get("clear_table_data_before_data_sync", False)):
                         clear_data_code, clear_data_output = clear_target_public_table_data(db, config, selected_tables=None)
                         if clear_data_output:
-                            self.queue.put(("log", clear_data_output + ("" if clear_data_output.endswith("\n") else "\n")))
+                            emit(("log", clear_data_output + ("" if clear_data_output.endswith("\n") else "\n")))
                         if clear_data_code != 0:
                             push_db_history("失败")
-                            self.queue.put(("failed", f"清理目标库表数据失败: {db}\n"))
-                            return
+                            emit(("failed", f"清理目标库表数据失败: {db}\n"))
+                            return False
                     coerce_code, coerce_output = coerce_target_json_columns_to_text(db, config, selected_tables=selected_tables)
                     if coerce_output:
-                        self.queue.put(("log", coerce_output + ("" if coerce_output.endswith("\n") else "\n")))
+                        emit(("log", coerce_output + ("" if coerce_output.endswith("\n") else "\n")))
                     if coerce_code != 0:
                         push_db_history("失败")
-                        self.queue.put(("failed", f"转换目标库 JSON 列失败: {db}\n"))
-                        return
+                        emit(("failed", f"转换目标库 JSON 列失败: {db}\n"))
+                        return False
                     datax_cfg = config.get("datax", {})
                     if not bool(datax_cfg.get("enabled", False)):
                         push_db_history("失败")
-                        self.queue.put(("failed", "DataX 未启用，请先勾选 DataX 启用。\n"))
-                        return
+                        emit(("failed", "DataX 未启用，请先勾选 DataX 启用。\n"))
+                        return False
                     datax_home = resolve_datax_home(self.workspace, datax_cfg)
                     datax_py = os.path.join(datax_home, "bin", "datax.py")
                     if not datax_home or not os.path.isfile(datax_py):
                         push_db_history("失败")
-                        self.queue.put((
+                        emit((
                             "failed",
                             f"DataX 配置无效，未找到: {datax_py}\n"
                             "请检查 datax.home 配置和当前工作目录。\n",
                         ))
-                        return
+                        return False
                     datax_cmd_cfg = dict(datax_cfg)
                     datax_cmd_cfg["home"] = datax_home
                     mysql_conn = resolve_mysql_conn(config, db)
                     source_uri_template = datax_cfg.get("source_uri") or config.get("source", {}).get("uri", "")
-                    source_uri = normalize_db_uri(source_uri_template.replace("{{DB_NAME}}", db))
-                    target_uri = normalize_db_uri(config.get("target", {}).get("uri", "").replace("{{DB_NAME}}", db))
-                    tables = get_mysql_tables(
-                        str(mysql_conn.get("container", "")),
-                        str(mysql_conn.get("user", "")),
-                        str(mysql_conn.get("password", "")),
-                        db,
-                        host=str(mysql_conn.get("host", "")),
-                        port=int(mysql_conn.get("port", 0) or 0),
-                    )
+                    source_uri = normalize_db_uri(fill_db_uri(source_uri_template, db))
+                    target_uri = normalize_db_uri(fill_db_uri(target_uri_cfg, db))
+                    tables = list_mysql_tables(mysql_conn, db)
                     if selected_tables:
                         tables, missing_tables = filter_tables_by_selected(tables, selected_tables)
                         if missing_tables:
-                            self.queue.put(("log", f"选中表在 {db} 中不存在: {', '.join(missing_tables)}\n"))
+                            emit(("log", f"选中表在 {db} 中不存在: {', '.join(missing_tables)}\n"))
                     else:
                         exclude_keywords = datax_cfg.get("exclude_table_keywords", [])
                         if not isinstance(exclude_keywords, list):
                             exclude_keywords = []
                         tables = [table for table in tables if not should_skip_table(table, exclude_keywords)]
                     if not tables:
-                        self.queue.put(("log", f"DataX skipped: no tables found in {db}\n"))
+                        emit(("log", f"DataX skipped: no tables found in {db}\n"))
                     else:
                         cleanup_on_finish = is_cleanup_jobs_on_finish(datax_cfg)
                         if cleanup_on_finish:
                             cleanup_datax_jobs_for_db(self.workspace, db, datax_cfg)
-                        self.queue.put(("log", f"DataX start: {db}, tables={len(tables)}\n"))
+                        emit(("log", f"DataX start: {db}, tables={len(tables)}\n"))
                         show_output_datax = bool(datax_cfg.get("show_output", False))
                         compact_log = bool(datax_cfg.get("compact_log", True))
                         table_parallelism = max(1, int(datax_cfg.get("table_parallelism", 3)))
-                        self.queue.put(("log", f"DataX table parallelism: {table_parallelism}\n"))
+                        emit(("log", f"DataX table parallelism: {table_parallelism}\n"))
+                        # Columns and primary keys for the whole schema in one query instead of two per table
+                        schema_bundle = schema_bundle_for(mysql_conn, db)
+                        if schema_bundle is None:
+                            schema_bundle = {}
+                        missing_tables = [table for table in tables if table not in schema_bundle]
+                        if missing_tables:
+                            # Per-table fallbacks carry no primary keys; keep them out of the
+                            # cached bundle that ensure_primary_keys reads
+                            schema_bundle = dict(schema_bundle)
+                            # Bundle unavailable or incomplete: fetch the rest per table, 8 docker execs at a time
+                            def fetch_table_meta(table: str) -> dict:
+                                conn_args = (
+                                    str(mysql_conn.get("container", "")),
+                                    str(mysql_conn.get("user", "")),
+                                    str(mysql_conn.get("password", "")),
+                                    db,
+                                    table,
+                                )
+                                conn_kwargs = {
+                                    "host": str(mysql_conn.get("host", "")),
+                                    "port": int(mysql_conn.get("port", 0) or 0),
+                                }
+                                column_defs = get_mysql_column_defs(*conn_args, **conn_kwargs)
+                                split_pk = get_mysql_split_pk(*conn_args, **conn_kwargs) if column_defs else None
+                                return {"column_defs": column_defs, "split_pk": split_pk}
+                            with ThreadPoolExecutor(max_workers=min(8, len(missing_tables))) as executor:
+                                for table, table_meta in zip(missing_tables, executor.map(fetch_table_meta, missing_tables)):
+                                    schema_bundle[table] = table_meta
                         process_lock = threading.Lock()
                         def run_one_table(t_idx: int, table: str) -> tuple[int, str, str, str]:
                             if self.stop_event.is_set():
                                 return 130, table, "", ""
-                            column_defs = get_mysql_column_defs(
-                                str(mysql_conn.get("container", "")),
-                                str(mysql_conn.get("user", "")),
-                                str(mysql_conn.get("password", "")),
-                                db,
-                                table,
-                                host=str(mysql_conn.get("host", "")),
-                                port=int(mysql_conn.get("port", 0) or 0),
-                            )
+                            table_meta = schema_bundle[table]
+                            column_defs = table_meta["column_defs"]
+                            split_pk = table_meta["split_pk"]
                             columns = [column["name"] for column in column_defs]
                             if not columns:
-                                self.queue.put(("log", f"DataX skipped table: {db}.{table} (no columns)\n"))
+                                emit(("log", f"DataX skipped table: {db}.{table} (no columns)\n"))
                                 return 0, table, "", ""
-                            split_pk = get_mysql_split_pk(
-                                str(mysql_conn.get("container", "")),
-                                str(mysql_conn.get("user", "")),
-                                str(mysql_conn.get("password", "")),
-                                db,
-                                table,
-                                host=str(mysql_conn.get("host", "")),
-                                port=int(mysql_conn.get("port", 0) or 0),
-                            )
                             channel = int(datax_cfg.get("channel", 2))
                             batch_size = int(datax_cfg.get("batch_size", 2000))
                             has_json_columns = any(column.get("data_type") == "json" for column in column_defs)
@@ -388,7 +529,7 @@ class SyncWorkerMixin:
                                 column_defs=column_defs,
                             )
                             cmd_datax = build_datax_command(job_file, datax_cmd_cfg)
-                            self.queue.put(("log", f"DataX [{t_idx}/{len(tables)}] {db}.{table} (channel={channel}, batch={batch_size}, splitPk={split_pk_disp})\n"))
+                            emit(("log", f"DataX [{t_idx}/{len(tables)}] {db}.{table} (channel={channel}, batch={batch_size}, splitPk={split_pk_disp})\n"))
                             cmd_env = os.environ.copy()
                             for key, value in datax_cfg.get("env", {}).items():
                                 cmd_env[str(key)] = str(value)
@@ -396,32 +537,25 @@ class SyncWorkerMixin:
                                 cmd_datax,
                                 stdout=subprocess.PIPE,
                                 stderr=subprocess.STDOUT,
-                                text=True,
-                                encoding="utf-8",
-                                errors="replace",
+                                bufsize=0,
                                 cwd=self.workspace,
                                 env=cmd_env,
                             )
                             with process_lock:
                                 self.active_processes.add(process)
                                 self.current_process = process
-                            dtail = deque(maxlen=200)
+                            dtail = OutputTail()
+                            stop_is_set = self.stop_event.is_set
+                            # Compact mode forwards only key lines; resolve that choice once per table
+                            log_filter = is_datax_key_log if compact_log else None
                             try:
-                                assert process.stdout is not None
-                                for line in process.stdout:
-                                    if self.stop_event.is_set():
+                                for _ in self._stream_process_output(process, emit, dtail, show_output_datax, log_filter):
+                                    if stop_is_set():
                                         try:
                                             process.terminate()
                                         except Exception:
                                             pass
                                         break
-                                    dtail.append(line)
-                                    if show_output_datax:
-                                        if compact_log:
-                                            if is_datax_key_log(line):
-                                                self.queue.put(("log", line))
-                                        else:
-                                            self.queue.put(("log", line))
                                 dcode = process.wait()
                             finally:
                                 with process_lock:
@@ -433,7 +567,7 @@ class SyncWorkerMixin:
                             if self.stop_event.is_set():
                                 return 130, table, "", job_file
                             if dcode != 0:
-                                return dcode, table, "".join(dtail), job_file
+                                return dcode, table, dtail.text(), job_file
                             return 0, table, "", job_file
                         first_error: tuple[int, str, str, str] | None = None
                         with ThreadPoolExecutor(max_workers=table_parallelism) as executor:
@@ -453,8 +587,8 @@ class SyncWorkerMixin:
                                     for pending in futures:
                                         pending.cancel()
                                     push_db_history("已停止")
-                                    self.queue.put(("stopped",))
-                                    return
+                                    emit(("stopped",))
+                                    return False
                                 if dcode != 0 and first_error is None:
                                     first_error = (dcode, failed_table, detail, "")
                                     self.stop_event.set()
@@ -462,7 +596,7 @@ class SyncWorkerMixin:
                                         pending.cancel()
                         if first_error is not None:
                             _, failed_table, detail, _ = first_error
-                            if cleanup_on_finish:
+                            if cleanup_on_finish and not run_parallel:
                                 cleanup_empty_datax_job_dir(self.workspace, datax_cfg)
                             tip = ""
                             if is_datax_jvm_oom(detail):
@@ -471,15 +605,87 @@ class SyncWorkerMixin:
                                     "并将 JVM 调小（如 -Xms256m -Xmx1024m）。\n"
                                 )
                             push_db_history("失败")
-                            self.queue.put(("failed", f"\nDataX failed table: {db}.{failed_table}\n--- DataX output (last 200 lines) ---\n{detail}--- end ---\n{tip}"))
-                            return
-                        if cleanup_on_finish:
+                            emit(("failed", f"\nDataX failed table: {db}.{failed_table}\n--- DataX output (last 200 lines) ---\n{detail}--- end ---\n{tip}"))
+                            return False
+                        # Other databases may still be writing jobs into the shared directory
+                        if cleanup_on_finish and not run_parallel:
                             cleanup_empty_datax_job_dir(self.workspace, datax_cfg)
-                        self.queue.put(("log", f"DataX success: {db}\n"))
+                        emit(("log", f"DataX success: {db}\n"))
                     if not self.stop_event.is_set():
                         push_db_history("成功")
-                        self.queue.put(("phase_done",))
+                        emit(("phase_done",))
+                return True
+
+            if run_parallel:
+                if not self._run_databases_parallel(execution_items, run_phase, min(parallel, total_dbs)):
+                    return
+                if is_cleanup_jobs_on_finish(config.get("datax", {})):
+                    cleanup_empty_datax_job_dir(self.workspace, config.get("datax", {}))
+            else:
+                for db, phase in execution_items:
+                    if not run_phase(db, phase, self.queue.put):
+                        return
             self.queue.put(("done",))
         except Exception as exc:
             self.queue.put(("log", f"\n线程异常: {exc}\n"))
             self.queue.put(("stopped",))
+        finally:
+            for session in mysql_sessions.values():
+                if session is not None:
+                    self.active_processes.discard(session.process)
+                    session.close()
+
+    def _stream_process_output(self, process: subprocess.Popen, emit, tail: OutputTail, show_output: bool, log_filter=None):
+        # Shared reader for child process output: keeps the raw tail, hands shown
+        # lines to the log buffer and yields (raw_bytes, lines) per chunk
+        assert process.stdout is not None
+        tail_append = tail.append
+        log_append = self.log_buffer.append
+        for data, lines in iter_output_batches(process.stdout):
+            tail_append(data)
+            if show_output:
+                for line in lines:
+                    if (log_filter is None or log_filter(line)) and log_append(line):
+                        emit(("log_batch",))
+            yield data, lines
+
+    def _run_databases_parallel(self, execution_items: list[tuple[str, str]], run_phase, workers: int) -> bool:
+        phases_by_db: dict[str, list[str]] = {}
+        for db, phase in execution_items:
+            phases_by_db.setdefault(db, []).append(phase)
+        terminal: list[tuple] = []
+        terminal_lock = threading.Lock()
+
+        def emit(msg: tuple) -> None:
+            # The first failure or stop ends the whole run; later ones are only echoes of it
+            if msg[0] in ("failed", "error", "stopped"):
+                with terminal_lock:
+                    if not terminal:
+                        terminal.append(msg)
+                self.stop_event.set()
+                for process in list(self.active_processes):
+                    try:
+                        if process.poll() is None:
+                            process.terminate()
+                    except Exception:
+                        pass
+                return
+            self.queue.put(msg)
+
+        def run_db(db: str) -> None:
+            try:
+                for phase in phases_by_db[db]:
+                    if not run_phase(db, phase, emit):
+                        return
+            except Exception:
+                self.stop_event.set()
+                raise
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run_db, phases_by_db))
+        if terminal:
+            self.queue.put(terminal[0])
+            return False
+        return True
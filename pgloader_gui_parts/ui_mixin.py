@@ -7,14 +7,14 @@ import threading
 import time
 import tkinter as tk
 from collections import deque
-from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
-from tkinter import filedialog, messagebox, ttk
+from tkinter import messagebox, ttk
 
 from pgloader_gui_core import (
     DEFAULT_CONFIG,
     SOURCE_TYPES,
     SYNC_HISTORY_FILE,
     URI_HISTORY_FILE,
+    MysqlSession,
     build_datax_command,
     build_datax_job,
     build_mysql_uri_from_conn,
@@ -29,14 +29,18 @@ from pgloader_gui_core import (
     clear_target_public_table_data,
     clear_target_public_tables,
     clear_target_public_views,
+    copy_config,
     ensure_target_primary_keys,
     filter_tables_by_selected,
+    fill_db_uri,
     get_mysql_columns,
     get_mysql_databases,
     get_mysql_split_pk,
     get_mysql_tables,
     get_target_databases,
+    get_db_sizes_bulk,
     get_total_tables,
+    get_total_tables_bulk,
     is_cleanup_jobs_on_finish,
     is_datax_jvm_oom,
     is_datax_key_log,
@@ -47,10 +51,13 @@ from pgloader_gui_core import (
     parse_db_uri,
     parse_selected_tables,
     patch_rendered_load_for_full_sync,
+    read_template,
     render_load_file,
     resolve_datax_home,
     resolve_mysql_conn,
     run_command,
+    run_psql_container_sql,
+    running_containers,
     save_config,
     should_skip_table,
     sync_views_for_db,
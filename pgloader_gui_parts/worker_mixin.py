@@ -7,14 +7,14 @@ import threading
 import time
 import tkinter as tk
 from collections import deque
-from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
-from tkinter import filedialog, messagebox, ttk
+from tkinter import messagebox, ttk
 
 from pgloader_gui_core import (
     DEFAULT_CONFIG,
     SOURCE_TYPES,
     SYNC_HISTORY_FILE,
     URI_HISTORY_FILE,
+    MysqlSession,
     build_datax_command,
     build_datax_job,
     build_mysql_uri_from_conn,
@@ -29,14 +29,18 @@ from pgloader_gui_core import (
     clear_target_public_table_data,
     clear_target_public_tables,
     clear_target_public_views,
+    copy_config,
     ensure_target_primary_keys,
     filter_tables_by_selected,
+    fill_db_uri,
     get_mysql_columns,
     get_mysql_databases,
     get_mysql_split_pk,
     get_mysql_tables,
     get_target_databases,
+    get_db_sizes_bulk,
     get_total_tables,
+    get_total_tables_bulk,
     is_cleanup_jobs_on_finish,
     is_datax_jvm_oom,
     is_datax_key_log,
@@ -47,15 +51,63 @@ from pgloader_gui_core import (
     parse_db_uri,
     parse_selected_tables,
     patch_rendered_load_for_full_sync,
+    read_template,
     render_load_file,
     resolve_datax_home,
     resolve_mysql_conn,
     run_command,
+    run_psql_container_sql,
+    running_containers,
     save_config,
     should_skip_table,
     sync_views_for_db,
 )
 
+_ANSI_ESCAPE_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+_LOG_INSERT_CHUNK = 16384
+
+class WakeupQueue(queue.Queue):
+    def __init__(self) -> None:
+        super().__init__()
+        self.wakeup = None
+
+    def put(self, item, block: bool = True, timeout: float | None = None) -> None:
+        super().put(item, block, timeout)
+        wakeup = self.wakeup
+        if wakeup is not None:
+            wakeup()
+
+
+# Worker threads append output lines here and only post a ("log_batch",) message
+# when the buffer goes from empty to non-empty; the Tk side drains everything
+# that piled up in one go.
+class LogBuffer:
+    # Bounded like the log widget: lines older than max_lines would be trimmed
+    # right after insertion anyway, so a log storm never queues more than that
+    def __init__(self, max_lines: int = 4000) -> None:
+        self.lock = threading.Lock()
+        self.lines: deque[str] = deque(maxlen=max_lines)
+        self.dropped = 0
+
+    def append(self, line: str) -> bool:
+        with self.lock:
+            lines = self.lines
+            if len(lines) == lines.maxlen:
+                self.dropped += 1
+            lines.append(line)
+            return len(lines) == 1
+
+    def drain(self) -> list[str]:
+        with self.lock:
+            lines = list(self.lines)
+            self.lines.clear()
+            dropped = self.dropped
+            self.dropped = 0
+        if dropped:
+            lines.insert(0, f"... 已省略 {dropped} 行输出\n")
+        return lines
+
+
 class WorkerMixin:
 
     def _run_selected(self, mode: str) -> None:
@@ -75,7 +127,7 @@ class WorkerMixin:
                 return
             selected_tables: list[str] = []
         else:
-            dbs = [self.db_list.get(i) for i in self.db_list.curselection()]
+            dbs = [self.db_items[i] for i in self.db_list.curselection()]
             if not dbs:
                 messagebox.showinfo("请选择", "请至少选择一个数据库。")
                 return
@@ -87,77 +139,15 @@ class WorkerMixin:
             if mode == "view":
                 selected_tables = []
 
-        try:
-            env = json.loads(self.env_text.get("1.0", tk.END).strip() or "{}")
-        except json.JSONDecodeError as exc:
-            messagebox.showerror("错误", f"环境变量 JSON 无效: {exc}")
+        config = self._collect_config(dbs)
+        if config is None:
             return
-
-        try:
-            datax_channel = int(self.datax_channel.get().strip() or "2")
-            datax_batch_size = int(self.datax_batch_size.get().strip() or "2000")
-            datax_table_parallelism = int(self.datax_table_parallelism.get().strip() or "30")
-            datax_log_retention_days = int(self.datax_log_retention_days.get().strip() or "7")
-        except ValueError:
-            messagebox.showerror("错误", "DataX 并发通道、批大小、表并行数、日志保留天数必须是整数。")
-            return
-
-        if datax_table_parallelism < 1:
-            messagebox.showerror("错误", "DataX 表并行数必须大于等于 1。")
-            return
-        if datax_log_retention_days < 1:
-            messagebox.showerror("错误", "日志保留天数必须大于等于 1。")
-            return
-
-        config = {
-            "databases": dbs,
-            "selected_tables": selected_tables,
-            "load_template": self.load_template.get().strip(),
-            "source": {
-                "type": self.source_type.get().strip(),
-                "uri": self.source_uri.get().strip(),
-            },
-            "target": {
-                "uri": self.target_uri.get().strip(),
-                "psql_container": self.target_psql_container.get().strip() or "postgres16",
-            },
-            "mysql": {
-                "container": self.mysql_container.get().strip(),
-                "user": self.mysql_user.get().strip(),
-                "password": self.mysql_password.get(),
-            },
-            "pgloader": {
-                "image": self.pgloader_image.get().strip(),
-                "env": env,
-                "clear_public_before_sync": True,
-                "show_output": True,
-                "sync_views": True,
-                "clear_public_views_before_view_sync": bool(mode == "view"),
-                "clear_table_data_before_data_sync": bool(mode == "full"),
-            },
-            "datax": {
-                "enabled": bool(self.datax_enabled.get()),
-                "home": self.datax_home.get().strip(),
-                "python": self.datax_python.get().strip() or "python",
-                "jvm": "-Xms2g -Xmx6g -XX:+UseG1GC -XX:+HeapDumpOnOutOfMemoryError",
-                "loglevel": "warn",
-                "source_uri": self.datax_source_uri.get().strip(),
-                "mysql_jdbc_params": "useSSL=false",
-                "target_table_lowercase": True,
-                "target_column_lowercase": True,
-                "table_parallelism": datax_table_parallelism,
-                "channel": datax_channel,
-                "batch_size": datax_batch_size,
-                "job_dir": ".datax_jobs",
-                "cleanup_jobs_on_finish": True,
-                "show_output": True,
-                "compact_log": not bool(self.datax_verbose_log.get()),
-                "exclude_table_keywords": [],
-                "log_retention_days": datax_log_retention_days,
-                "log_dirs": ["datax/datax/log", "datax/datax/log_perf"],
-                "env": {},
-            },
-        }
+        config["selected_tables"] = selected_tables
+        config["pgloader"].update({
+            "sync_views": True,
+            "clear_public_views_before_view_sync": bool(mode == "view"),
+            "clear_table_data_before_data_sync": bool(mode == "full"),
+        })
 
         self._remember_uri(config["source"].get("uri", ""))
         self._remember_uri(config["target"].get("uri", ""))
@@ -207,27 +197,169 @@ class WorkerMixin:
         if not self.current_process:
             self.queue.put(("stopped",))
 
+    def _start_queue_pump(self) -> None:
+        if not self._install_queue_wakeup() and not self._install_queue_event():
+            self._poll_queue()
+
+    def _install_queue_wakeup(self) -> bool:
+        # Tk can watch file descriptors only on POSIX builds
+        if not isinstance(self.queue, WakeupQueue) or not hasattr(self.tk, "createfilehandler"):
+            return False
+        try:
+            read_fd, write_fd = os.pipe()
+        except OSError:
+            return False
+        try:
+            os.set_blocking(read_fd, False)
+            os.set_blocking(write_fd, False)
+            self.tk.createfilehandler(read_fd, tk.READABLE, self._on_queue_wakeup)
+        except Exception:
+            os.close(read_fd)
+            os.close(write_fd)
+            return False
+        self.queue_wakeup_fds = (read_fd, write_fd)
+        self.queue_wakeup_pending = False
+        self.queue.wakeup = self._signal_queue_wakeup
+        return True
+
+    def _signal_queue_wakeup(self) -> None:
+        # Called from worker threads; one pending byte is enough to get the queue drained
+        if self.queue_wakeup_pending:
+            return
+        self.queue_wakeup_pending = True
+        try:
+            os.write(self.queue_wakeup_fds[1], b"\0")
+        except OSError:
+            pass
+
+    def _install_queue_event(self) -> bool:
+        # Windows has no createfilehandler; a threaded Tcl lets workers post a
+        # virtual event instead, which Tk marshals onto the main thread
+        if not isinstance(self.queue, WakeupQueue):
+            return False
+        try:
+            threaded = bool(self.tk.call("info", "exists", "tcl_platform(threaded)"))
+        except tk.TclError:
+            threaded = False
+        if not threaded:
+            return False
+        self.bind("<<QueueMsg>>", self._on_queue_event)
+        self.queue_wakeup_pending = False
+        self.queue.wakeup = self._signal_queue_event
+        # Messages posted before mainloop starts cannot raise the event yet
+        self.after(self.poll_idle_ms, self._drain_queue)
+        return True
+
+    def _signal_queue_event(self) -> None:
+        if self.queue_wakeup_pending:
+            return
+        self.queue_wakeup_pending = True
+        try:
+            self.event_generate("<<QueueMsg>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            self.queue_wakeup_pending = False
+
+    def _on_queue_event(self, _event=None) -> None:
+        self.queue_wakeup_pending = False
+        self._drain_queue()
+
+    def _on_queue_wakeup(self, _fd=None, _mask=None) -> None:
+        # Empty the pipe before clearing the flag: a byte written in between would
+        # otherwise be swallowed while the flag stays set, and no later put() would
+        # ever write again. Messages queued before the clear are picked up by the drain.
+        try:
+            while os.read(self.queue_wakeup_fds[0], 4096):
+                pass
+        except OSError:
+            pass
+        self.queue_wakeup_pending = False
+        self._drain_queue()
+
     def _poll_queue(self) -> None:
+        # Fallback when no push wakeup is available: poll fast while a sync runs
+        # and back off while nothing arrives so an idle window rarely wakes up
+        received = self._drain_queue()
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            self.poll_delay_ms = self.poll_busy_ms
+        elif received:
+            self.poll_delay_ms = self.poll_idle_ms
+        else:
+            self.poll_delay_ms = min(self.poll_delay_ms * 2, self.poll_max_idle_ms)
+        self.after(self.poll_delay_ms, self._poll_queue)
+
+    def _drain_queue(self) -> bool:
+        pending_log: list[str] = []
+        # Only the newest progress/size snapshot per tick is worth a widget update
+        latest: dict[str, tuple] = {}
+
+        def flush() -> None:
+            if pending_log:
+                self._append_log_text("".join(pending_log))
+                pending_log.clear()
+            for pending in latest.values():
+                self._handle_message(pending)
+            latest.clear()
+
+        received = False
         try:
             while True:
                 msg = self.queue.get_nowait()
+                received = True
+                kind = msg[0]
+                if kind == "log":
+                    # Keep buffered process output ahead of the status line that follows it
+                    if self.log_flush_after_id is not None:
+                        pending_log.extend(self.log_buffer.drain())
+                    pending_log.append(msg[1])
+                    continue
+                if kind == "log_batch":
+                    # Output is inserted (and scrolled to) at most once per log_flush_ms
+                    if self.log_flush_after_id is None:
+                        self.log_flush_after_id = self.after(self.log_flush_ms, self._flush_log_buffer)
+                    continue
+                if kind in ("progress", "size"):
+                    latest.pop(kind, None)
+                    latest[kind] = msg
+                    continue
+                if self.log_flush_after_id is not None:
+                    pending_log.extend(self.log_buffer.drain())
+                flush()
                 self._handle_message(msg)
         except queue.Empty:
             pass
-        self.after(200, self._poll_queue)
+        flush()
+        return received
+
+    def _flush_log_buffer(self) -> None:
+        self.log_flush_after_id = None
+        lines = self.log_buffer.drain()
+        if lines:
+            self._append_log_text("".join(lines))
+
+    def _append_log_text(self, text: str) -> None:
+        if "\x1b" in text:
+            text = _ANSI_ESCAPE_RE.sub("", text)
+        if len(text) <= _LOG_INSERT_CHUNK:
+            self.log_text.insert(tk.END, text)
+        else:
+            # Large tails (error output, a long backlog) go in slices so Tk can redraw in between
+            for start in range(0, len(text), _LOG_INSERT_CHUNK):
+                self.log_text.insert(tk.END, text[start:start + _LOG_INSERT_CHUNK])
+                self.log_text.update_idletasks()
+        self._trim_log_lines()
+        self.log_text.see(tk.END)
 
     def _handle_message(self, msg: tuple) -> None:
         kind = msg[0]
         if kind == "log":
-            self.log_text.insert(tk.END, msg[1])
-            self._trim_log_lines()
-            self.log_text.see(tk.END)
+            self._append_log_text(msg[1])
         elif kind == "db_list":
             dbs = msg[1]
             keep_selected = set(self.selected_dbs)
             self.db_list.delete(0, tk.END)
-            for db in dbs:
-                self.db_list.insert(tk.END, db)
+            self.db_items = list(dbs)
+            if dbs:
+                self.db_list.insert(tk.END, *dbs)
             db_keys = {db.lower() for db in dbs}
             self.full_sync_dbs = [db for db in self.full_sync_dbs if db.lower() in db_keys]
             self._refresh_full_sync_list_widget()
@@ -252,7 +384,12 @@ class WorkerMixin:
             self._set_info_text(self.target_info_text, msg[1])
         elif kind == "progress":
             db, processed, total, idx, total_dbs, overall_done, overall_total = msg[1:]
-            if total > 0:
+            if self.run_parallel and overall_total > 0:
+                # Databases interleave when run in parallel, so a per-database bar would jump around
+                percent = min(100, int((overall_done * 100) / overall_total))
+                self.progress.configure(value=percent)
+                self.progress_label.configure(text=f"总体: {percent}% ({overall_done}/{overall_total}) [最近: {db}]")
+            elif total > 0:
                 percent = min(100, int((processed * 100) / total))
                 self.progress.configure(value=percent)
                 self.progress_label.configure(text=f"{db}: {percent}% ({processed}/{total}) [DB {idx}/{total_dbs}]")
@@ -264,29 +401,28 @@ class WorkerMixin:
                 self._update_eta(overall_done, overall_total)
         elif kind == "error":
             db, tail = msg[1], msg[2]
-            self.log_text.insert(tk.END, f"\n同步失败: {db}\n")
-            self.log_text.insert(tk.END, "--- pgloader 输出 (最后 200 行) ---\n")
-            self.log_text.insert(tk.END, "".join(tail))
-            self.log_text.insert(tk.END, "--- 结束 ---\n")
             tail_text = "".join(tail)
+            parts = [
+                f"\n同步失败: {db}\n",
+                "--- pgloader 输出 (最后 200 行) ---\n",
+                tail_text,
+                "--- 结束 ---\n",
+            ]
             if "max_locks_per_transaction" in tail_text:
-                self.log_text.insert(
-                    tk.END,
+                parts.append(
                     "提示: PostgreSQL 的 max_locks_per_transaction 不足。"
                     "当前模板已去掉 include drop 降低锁压力；"
-                    "如仍失败，请在目标库提升该参数并重启 PostgreSQL。\n",
+                    "如仍失败，请在目标库提升该参数并重启 PostgreSQL。\n"
                 )
-            self.log_text.see(tk.END)
+            self._append_log_text("".join(parts))
             self._set_idle()
         elif kind == "failed":
-            self.log_text.insert(tk.END, msg[1])
-            self.log_text.see(tk.END)
+            self._append_log_text(msg[1])
             self._set_idle()
         elif kind == "done":
             self._set_idle()
         elif kind == "stopped":
-            self.log_text.insert(tk.END, "\n已停止。\n")
-            self.log_text.see(tk.END)
+            self._append_log_text("\n已停止。\n")
             self._set_idle()
         elif kind == "size":
             total_bytes = msg[1]
@@ -318,7 +454,8 @@ class WorkerMixin:
 
     def _trim_log_lines(self) -> None:
         total_lines = int(self.log_text.index("end-1c").split(".")[0])
-        if total_lines <= self.max_log_lines:
+        # Let the widget overshoot by a batch so the head is cut once per batch, not per append
+        if total_lines <= self.max_log_lines + self.log_trim_batch_lines:
             return
         remove_until = total_lines - self.max_log_lines
         self.log_text.delete("1.0", f"{remove_until}.0")
@@ -1,6 +1,5 @@
 ﻿import argparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import glob
+import functools
 import json
 import os
 import re
@@ -99,6 +98,26 @@ def load_config(path: str) -> Dict:
         return json.load(f)
 
 
+@functools.lru_cache(maxsize=32)
+def mysql_exec_prefix(mysql_container: str, user: str, host: str = "", port: int = 0, charset: bool = True) -> tuple:
+    # `-e MYSQL_PWD` without a value forwards it from the docker client's env
+    # (mysql_exec_env), keeping the password out of every argv
+    cmd = ["docker", "exec", "-e", "MYSQL_PWD", mysql_container, "mysql"]
+    if charset:
+        cmd.append("--default-character-set=utf8mb4")
+    cmd.extend([f"-u{user}", "-N"])
+    if host:
+        cmd.extend(["-h", host])
+    if port:
+        cmd.extend(["-P", str(port)])
+    return tuple(cmd)
+
+
+def mysql_exec_env(password: str) -> Dict[str, str]:
+    # Built per call: picks up later environment changes and keeps no password copies around
+    return {**os.environ, "MYSQL_PWD": password}
+
+
 def run_command(
     cmd: List[str],
     cwd: Optional[str] = None,
@@ -107,6 +126,54 @@ def run_command(
     return subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, text=True)
 
 
+def stream_command(
+    cmd: List[str],
+    line_cb,
+    cwd: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+    chunk_cb=None,
+) -> int:
+    # Long pgloader/DataX runs: read the pipe in 64 KB chunks, decode each chunk
+    # once and hand complete lines to line_cb instead of a text-mode readline loop.
+    # chunk_cb then gets the chunk's whole line list, for per-chunk bulk work.
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=0,
+        cwd=cwd,
+        env=env,
+    )
+    assert process.stdout is not None
+    fd = process.stdout.fileno()
+    pending = b""
+    while True:
+        chunk = os.read(fd, 1 << 16)
+        if not chunk:
+            break
+        if pending:
+            chunk = pending + chunk
+        cut = chunk.rfind(b"\n") + 1
+        if not cut:
+            pending = chunk
+            continue
+        pending = chunk[cut:]
+        text = chunk[:cut].decode("utf-8", "replace")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        lines = text.splitlines(keepends=True)
+        for line in lines:
+            line_cb(line)
+        if chunk_cb is not None:
+            chunk_cb(lines)
+    if pending:
+        lines = [pending.decode("utf-8", "replace")]
+        line_cb(lines[0])
+        if chunk_cb is not None:
+            chunk_cb(lines)
+    return process.wait()
+
+
 def normalize_db_uri(uri: str) -> str:
     text = (uri or "").strip()
     if not text:
@@ -144,25 +211,12 @@ def resolve_mysql_conn(config: Dict, db: str) -> Dict[str, str | int]:
 
 
 def get_total_tables(mysql_container: str, user: str, password: str, db: str, host: str = "", port: int = 0) -> int:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        "--default-character-set=utf8mb4",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
     cmd.extend([
         "-e",
         f"SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='{db}';",
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return 0
     output = (result.stdout or "").strip().splitlines()
@@ -174,6 +228,9 @@ def get_total_tables(mysql_container: str, user: str, password: str, db: str, ho
         return 0
 
 
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
 def render_load_file(template_path: str, output_path: str, replacements: Dict[str, str]) -> None:
     with open(template_path, "r", encoding="utf-8") as f:
         content = f.read()
@@ -186,8 +243,8 @@ def render_load_file(template_path: str, output_path: str, replacements: Dict[st
         else:
             content = content.rstrip() + "\n\n" + table_filter + "\n"
 
-    for key, value in replacements.items():
-        content = content.replace(f"{{{{{key}}}}}", value)
+    # One pass over the template; unknown placeholders are left as they are
+    content = _PLACEHOLDER_RE.sub(lambda m: replacements.get(m.group(1), m.group(0)), content)
 
     with open(output_path, "w", encoding="utf-8") as f:
         f.write(content)
@@ -203,47 +260,79 @@ def build_pgloader_command(
     for key, value in env.items():
         cmd.extend(["-e", f"{key}={value}"])
     cmd.extend(["-v", f"{workspace}:/pgloader", image])
-    cmd.extend([
-        "sh",
-        "-c",
-        f"pgloader --on-error-stop /pgloader/{load_file}",
-    ])
+    # Run pgloader as the container command itself: no extra shell, stop signals
+    # reach pgloader, and the file name is never parsed by a shell
+    cmd.extend(["pgloader", "--on-error-stop", f"/pgloader/{load_file}"])
     return cmd
 
 
-def parse_db_uri(uri: str) -> Dict[str, str | int]:
+@functools.lru_cache(maxsize=64)
+def _parse_db_uri_fields(uri: str) -> tuple:
     parsed = urlparse(uri)
     if not parsed.scheme:
         raise ValueError(f"Invalid URI: {uri}")
+    return (
+        parsed.scheme,
+        parsed.hostname or "",
+        parsed.port or 0,
+        unquote(parsed.username or ""),
+        unquote(parsed.password or ""),
+        (parsed.path or "").lstrip("/"),
+    )
+
+
+def parse_db_uri(uri: str) -> Dict[str, str | int]:
+    # Same URIs are parsed once per database/table; cache the fields, not the dict
+    scheme, host, port, user, password, database = _parse_db_uri_fields(uri)
     return {
-        "scheme": parsed.scheme,
-        "host": parsed.hostname or "",
-        "port": parsed.port or 0,
-        "user": unquote(parsed.username or ""),
-        "password": unquote(parsed.password or ""),
-        "database": (parsed.path or "").lstrip("/"),
+        "scheme": scheme,
+        "host": host,
+        "port": port,
+        "user": user,
+        "password": password,
+        "database": database,
     }
 
 
 def pg_quote_ident(name: str) -> str:
-    return '"' + name.replace('"', '""') + '"'
+    if '"' in name:
+        name = name.replace('"', '""')
+    return f'"{name}"'
 
 
 def build_clear_public_sql(selected_tables: Optional[List[str]] = None) -> str:
     selected = parse_selected_tables(selected_tables)
     if not selected:
+        # One DROP over every public table: a single parse and lock pass instead of one per row
         return (
             "DO $$ "
-            "DECLARE r record; "
+            "DECLARE tbls text; "
             "BEGIN "
-            "FOR r IN SELECT tablename FROM pg_tables WHERE schemaname='public' LOOP "
-            "EXECUTE format('DROP TABLE IF EXISTS public.%I CASCADE', r.tablename); "
-            "END LOOP; "
+            "SELECT string_agg(format('public.%I', tablename), ', ') INTO tbls "
+            "FROM pg_tables WHERE schemaname='public'; "
+            "IF tbls IS NOT NULL THEN "
+            "EXECUTE 'DROP TABLE IF EXISTS ' || tbls || ' CASCADE'; "
+            "END IF; "
             "END $$;"
         )
 
-    stmts = [f"DROP TABLE IF EXISTS public.{pg_quote_ident(table)} CASCADE;" for table in selected]
-    return "\n".join(stmts)
+    return "DROP TABLE IF EXISTS " + ", ".join(f"public.{pg_quote_ident(table)}" for table in selected) + " CASCADE;"
+
+
+# psql containers that docker reported as absent or stopped; later calls go
+# straight to the local psql instead of paying for another failing docker exec
+_PSQL_CONTAINER_MISSING: set[str] = set()
+
+
+def run_psql_container_command(psql_container: str, container_cmd: List[str]) -> Optional[subprocess.CompletedProcess]:
+    if psql_container in _PSQL_CONTAINER_MISSING:
+        return None
+    result = run_command(container_cmd)
+    if result.returncode != 0:
+        error = (result.stderr or "").lower()
+        if "no such container" in error or "is not running" in error:
+            _PSQL_CONTAINER_MISSING.add(psql_container)
+    return result
 
 
 def clear_target_public_tables(db: str, config: Dict, selected_tables: Optional[List[str]] = None) -> int:
@@ -290,8 +379,8 @@ def clear_target_public_tables(db: str, config: Dict, selected_tables: Optional[
         print(f"Clearing selected target tables: {target.get('database', '')}, tables={len(selected)}")
     else:
         print(f"Clearing target public tables: {target.get('database', '')}")
-    container_result = run_command(container_cmd)
-    if container_result.returncode == 0:
+    container_result = run_psql_container_command(psql_container, container_cmd)
+    if container_result is not None and container_result.returncode == 0:
         return 0
 
     psql_cmd = target_cfg.get("psql", "psql")
@@ -319,10 +408,8 @@ def clear_target_public_tables(db: str, config: Dict, selected_tables: Optional[
 
     result = run_command(local_cmd, env=cmd_env)
     if result.returncode != 0:
-        if container_result.stdout:
-            sys.stdout.write(container_result.stdout)
-        if container_result.stderr:
-            sys.stdout.write(container_result.stderr)
+        if container_result is not None:
+            sys.stdout.write((container_result.stdout or "") + (container_result.stderr or ""))
         if result.stdout:
             sys.stdout.write(result.stdout)
         if result.stderr:
@@ -330,21 +417,17 @@ def clear_target_public_tables(db: str, config: Dict, selected_tables: Optional[
     return result.returncode
 
 
+# Full mode lists a database's tables for the structure phase and again for DataX
+_MYSQL_TABLES_CACHE: Dict[tuple, tuple] = {}
+_MYSQL_TABLES_TTL = 30.0
+
+
 def get_mysql_tables(mysql_container: str, user: str, password: str, db: str, host: str = "", port: int = 0) -> List[str]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        "--default-character-set=utf8mb4",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    key = (mysql_container, user, host, port, db)
+    cached = _MYSQL_TABLES_CACHE.get(key)
+    if cached is not None and time.monotonic() - cached[1] < _MYSQL_TABLES_TTL:
+        return list(cached[0])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
     cmd.extend([
         "-e",
         (
@@ -352,27 +435,17 @@ def get_mysql_tables(mysql_container: str, user: str, password: str, db: str, ho
             f"WHERE table_schema='{db}' AND table_type='BASE TABLE' ORDER BY table_name;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return []
-    return [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
+    tables = [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
+    if tables:
+        _MYSQL_TABLES_CACHE[key] = (tuple(tables), time.monotonic())
+    return tables
 
 
 def get_mysql_views(mysql_container: str, user: str, password: str, db: str, host: str = "", port: int = 0) -> List[str]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        "--default-character-set=utf8mb4",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
     cmd.extend([
         "-e",
         (
@@ -380,7 +453,7 @@ def get_mysql_views(mysql_container: str, user: str, password: str, db: str, hos
             f"WHERE table_schema='{db}' ORDER BY table_name;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return []
     return [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
@@ -395,20 +468,7 @@ def get_mysql_view_definition(
     host: str = "",
     port: int = 0,
 ) -> str:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        "--default-character-set=utf8mb4",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port))
     cmd.extend([
         "-e",
         (
@@ -416,7 +476,7 @@ def get_mysql_view_definition(
             f"WHERE table_schema='{db}' AND table_name='{view_name}';"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return ""
     lines = [line.rstrip("\r") for line in (result.stdout or "").splitlines() if line.strip()]
@@ -494,8 +554,8 @@ def run_pg_sql(db: str, config: Dict, sql: str) -> int:
         sql,
     ]
 
-    container_result = run_command(container_cmd)
-    if container_result.returncode == 0:
+    container_result = run_psql_container_command(psql_container, container_cmd)
+    if container_result is not None and container_result.returncode == 0:
         return 0
 
     psql_cmd = target_cfg.get("psql", "psql")
@@ -523,10 +583,8 @@ def run_pg_sql(db: str, config: Dict, sql: str) -> int:
 
     result = run_command(local_cmd, env=cmd_env)
     if result.returncode != 0:
-        if container_result.stdout:
-            sys.stdout.write(container_result.stdout)
-        if container_result.stderr:
-            sys.stdout.write(container_result.stderr)
+        if container_result is not None:
+            sys.stdout.write((container_result.stdout or "") + (container_result.stderr or ""))
         if result.stdout:
             sys.stdout.write(result.stdout)
         if result.stderr:
@@ -625,19 +683,7 @@ def get_mysql_columns(
     host: str = "",
     port: int = 0,
 ) -> List[str]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
     cmd.extend([
         "-e",
         (
@@ -645,7 +691,7 @@ def get_mysql_columns(
             f"WHERE table_schema='{db}' AND table_name='{table}' ORDER BY ordinal_position;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return []
     return [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
@@ -660,19 +706,7 @@ def get_mysql_column_defs(
     host: str = "",
     port: int = 0,
 ) -> List[Dict[str, str]]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
     cmd.extend([
         "-e",
         (
@@ -680,7 +714,7 @@ def get_mysql_column_defs(
             f"WHERE table_schema='{db}' AND table_name='{table}' ORDER BY ordinal_position;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return []
 
@@ -708,19 +742,7 @@ def get_mysql_primary_key_map(
     host: str = "",
     port: int = 0,
 ) -> Dict[str, List[str]]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
     cmd.extend([
         "-e",
         (
@@ -734,7 +756,7 @@ def get_mysql_primary_key_map(
             "ORDER BY tc.table_name, k.ordinal_position;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return {}
 
@@ -847,8 +869,8 @@ def ensure_target_primary_keys(db: str, config: Dict, selected_tables: Optional[
         sql,
     ]
 
-    container_result = run_command(container_cmd)
-    if container_result.returncode == 0:
+    container_result = run_psql_container_command(psql_container, container_cmd)
+    if container_result is not None and container_result.returncode == 0:
         return 0
 
     psql_cmd = target_cfg.get("psql", "psql")
@@ -876,10 +898,8 @@ def ensure_target_primary_keys(db: str, config: Dict, selected_tables: Optional[
 
     result = run_command(local_cmd, env=cmd_env)
     if result.returncode != 0:
-        if container_result.stdout:
-            sys.stdout.write(container_result.stdout)
-        if container_result.stderr:
-            sys.stdout.write(container_result.stderr)
+        if container_result is not None:
+            sys.stdout.write((container_result.stdout or "") + (container_result.stderr or ""))
         if result.stdout:
             sys.stdout.write(result.stdout)
         if result.stderr:
@@ -937,8 +957,8 @@ def get_target_json_columns(db: str, config: Dict, selected_tables: Optional[Lis
         "-c",
         sql,
     ]
-    container_result = run_command(container_cmd)
-    if container_result.returncode == 0:
+    container_result = run_psql_container_command(psql_container, container_cmd)
+    if container_result is not None and container_result.returncode == 0:
         output = (container_result.stdout or "") + (container_result.stderr or "")
     else:
         psql_cmd = target_cfg.get("psql", "psql")
@@ -964,12 +984,9 @@ def get_target_json_columns(db: str, config: Dict, selected_tables: Optional[Lis
             cmd_env["PGPASSWORD"] = password
         local_result = run_command(local_cmd, env=cmd_env)
         if local_result.returncode != 0:
-            output = (
-                (container_result.stdout or "")
-                + (container_result.stderr or "")
-                + (local_result.stdout or "")
-                + (local_result.stderr or "")
-            )
+            output = (local_result.stdout or "") + (local_result.stderr or "")
+            if container_result is not None:
+                output = (container_result.stdout or "") + (container_result.stderr or "") + output
             return local_result.returncode, {}, output
         output = (local_result.stdout or "") + (local_result.stderr or "")
 
@@ -1021,6 +1038,18 @@ def coerce_target_json_columns_to_text(db: str, config: Dict, selected_tables: O
     return run_pg_sql(db, config, "\n".join(sql_blocks))
 
 
+_SPLIT_PK_NUMERIC_TYPES = frozenset({
+    "tinyint",
+    "smallint",
+    "mediumint",
+    "int",
+    "integer",
+    "bigint",
+    "decimal",
+    "numeric",
+})
+
+
 def get_mysql_split_pk(
     mysql_container: str,
     user: str,
@@ -1030,19 +1059,7 @@ def get_mysql_split_pk(
     host: str = "",
     port: int = 0,
 ) -> Optional[str]:
-    cmd = [
-        "docker",
-        "exec",
-        mysql_container,
-        "mysql",
-        f"-u{user}",
-        f"-p{password}",
-        "-N",
-    ]
-    if host:
-        cmd.extend(["-h", host])
-    if port:
-        cmd.extend(["-P", str(port)])
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
     cmd.extend([
         "-e",
         (
@@ -1059,7 +1076,7 @@ def get_mysql_split_pk(
             "ORDER BY k.ordinal_position;"
         ),
     ])
-    result = run_command(cmd)
+    result = run_command(cmd, env=mysql_exec_env(password))
     if result.returncode != 0:
         return None
     rows = [line.strip() for line in (result.stdout or "").splitlines() if line.strip()]
@@ -1070,27 +1087,77 @@ def get_mysql_split_pk(
         return None
     col_name = parts[0].strip()
     data_type = parts[1].strip().lower()
-    numeric_types = {
-        "tinyint",
-        "smallint",
-        "mediumint",
-        "int",
-        "integer",
-        "bigint",
-        "decimal",
-        "numeric",
-    }
-    if data_type not in numeric_types:
+    if data_type not in _SPLIT_PK_NUMERIC_TYPES:
         return None
     return col_name
 
 
+def get_mysql_schema_bundle(
+    mysql_container: str,
+    user: str,
+    password: str,
+    db: str,
+    host: str = "",
+    port: int = 0,
+) -> Optional[Dict[str, Dict]]:
+    # Columns, types and primary keys for every table of a schema in one round trip,
+    # instead of a column and a split-pk query per table
+    cmd = list(mysql_exec_prefix(mysql_container, user, host, port, charset=False))
+    cmd.extend([
+        "-e",
+        (
+            "SELECT 'C', table_name, column_name, data_type FROM information_schema.columns "
+            f"WHERE table_schema='{db}' ORDER BY table_name, ordinal_position;\n"
+            "SELECT 'P', k.table_name, k.column_name, c.data_type FROM information_schema.table_constraints tc "
+            "JOIN information_schema.key_column_usage k "
+            "ON tc.constraint_name = k.constraint_name "
+            "AND tc.table_schema = k.table_schema "
+            "AND tc.table_name = k.table_name "
+            "JOIN information_schema.columns c "
+            "ON c.table_schema = k.table_schema "
+            "AND c.table_name = k.table_name "
+            "AND c.column_name = k.column_name "
+            f"WHERE tc.constraint_type='PRIMARY KEY' AND tc.table_schema='{db}' "
+            "ORDER BY k.table_name, k.ordinal_position;"
+        ),
+    ])
+    result = run_command(cmd, env=mysql_exec_env(password))
+    if result.returncode != 0:
+        return None
+
+    column_defs: Dict[str, List[Dict[str, str]]] = {}
+    pk_columns: Dict[str, List[tuple]] = {}
+    for line in (result.stdout or "").splitlines():
+        parts = line.strip().split("\t")
+        if len(parts) < 4:
+            continue
+        tag, table_name, column_name, data_type = (part.strip() for part in parts[:4])
+        if not table_name or not column_name:
+            continue
+        if tag == "C":
+            column_defs.setdefault(table_name, []).append({"name": column_name, "data_type": data_type.lower()})
+        elif tag == "P":
+            pk_columns.setdefault(table_name, []).append((column_name, data_type.lower()))
+
+    bundle: Dict[str, Dict] = {}
+    for table, defs in column_defs.items():
+        pk = pk_columns.get(table, [])
+        # DataX can only split on a single-column numeric primary key
+        split_pk = pk[0][0] if len(pk) == 1 and pk[0][1] in _SPLIT_PK_NUMERIC_TYPES else None
+        bundle[table] = {"column_defs": defs, "split_pk": split_pk}
+    return bundle
+
+
 def mysql_ident(name: str) -> str:
-    return "`" + name.replace("`", "``") + "`"
+    if "`" in name:
+        name = name.replace("`", "``")
+    return f"`{name}`"
 
 
 def pg_ident(name: str) -> str:
-    return '"' + name.replace('"', '""') + '"'
+    if '"' in name:
+        name = name.replace('"', '""')
+    return f'"{name}"'
 
 
 def build_mysql_query_sql(table: str, column_defs: List[Dict[str, str]]) -> str:
@@ -1196,10 +1263,16 @@ def build_datax_job(
         job["job"]["content"][0]["reader"]["parameter"]["splitPk"] = split_pk
 
     job_folder = os.path.join(workspace, job_dir)
-    os.makedirs(job_folder, exist_ok=True)
     job_file = os.path.join(job_folder, f"{db}.{table}.json")
-    with open(job_file, "w", encoding="utf-8") as f:
-        json.dump(job, f, ensure_ascii=False, indent=2)
+    content = json.dumps(job, ensure_ascii=False, separators=(",", ":"))
+    # The folder exists for every table but the first; only create it when the open says so
+    try:
+        f = open(job_file, "w", encoding="utf-8")
+    except FileNotFoundError:
+        os.makedirs(job_folder, exist_ok=True)
+        f = open(job_file, "w", encoding="utf-8")
+    with f:
+        f.write(content)
     return job_file
 
 
@@ -1233,12 +1306,18 @@ def cleanup_datax_jobs_for_db(workspace: str, db: str, datax_cfg: Dict) -> None:
     folder = os.path.join(workspace, job_dir)
     if not os.path.isdir(folder):
         return
-    pattern = os.path.join(folder, f"{db}.*.json")
-    for path in glob.glob(pattern):
-        try:
-            os.remove(path)
-        except OSError:
-            pass
+    prefix = f"{db}."
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                name = entry.name
+                if name.startswith(prefix) and name.endswith(".json"):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+    except OSError:
+        pass
 
 
 def cleanup_datax_job_file(path: str) -> None:
@@ -1270,9 +1349,38 @@ def cleanup_pgloader_rendered_file(path: str) -> None:
 
 
 def cleanup_pgloader_rendered_files_for_db(workspace: str, db: str) -> None:
-    pattern = os.path.join(workspace, f".pgloader_rendered_{db}*.load")
-    for path in glob.glob(pattern):
-        cleanup_pgloader_rendered_file(path)
+    prefix = f".pgloader_rendered_{db}"
+    try:
+        with os.scandir(workspace) as it:
+            for entry in it:
+                name = entry.name
+                if name.startswith(prefix) and name.endswith(".load"):
+                    cleanup_pgloader_rendered_file(entry.path)
+    except OSError:
+        pass
+
+
+def _prune_old_files(folder: str, cutoff: float) -> int:
+    # One scandir per directory: DirEntry caches the type and stat, and the
+    # survivor count replaces a second listdir before rmdir
+    survivors = 0
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not _prune_old_files(entry.path, cutoff):
+                            os.rmdir(entry.path)
+                            continue
+                    elif entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        continue
+                except OSError:
+                    pass
+                survivors += 1
+    except OSError:
+        return 1
+    return survivors
 
 
 def cleanup_old_logs(workspace: str, log_dirs: List[str], retention_days: int) -> None:
@@ -1285,21 +1393,7 @@ def cleanup_old_logs(workspace: str, log_dirs: List[str], retention_days: int) -
         folder = path if os.path.isabs(path) else os.path.join(workspace, path)
         if not os.path.isdir(folder):
             continue
-        for root, dirs, files in os.walk(folder, topdown=False):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                try:
-                    if os.path.getmtime(file_path) < cutoff:
-                        os.remove(file_path)
-                except OSError:
-                    pass
-            for dir_name in dirs:
-                dir_path = os.path.join(root, dir_name)
-                try:
-                    if not os.listdir(dir_path):
-                        os.rmdir(dir_path)
-                except OSError:
-                    pass
+        _prune_old_files(folder, cutoff)
 
 
 def cleanup_datax_logs_by_retention(workspace: str, datax_cfg: Dict) -> None:
@@ -1395,6 +1489,15 @@ def run_datax_for_db(db: str, config: Dict, workspace: str, selected_tables: Opt
     if coerce_code != 0:
         return coerce_code
 
+    schema_bundle = get_mysql_schema_bundle(
+        str(mysql_conn.get("container", "")),
+        str(mysql_conn.get("user", "")),
+        str(mysql_conn.get("password", "")),
+        db,
+        host=str(mysql_conn.get("host", "")),
+        port=int(mysql_conn.get("port", 0) or 0),
+    ) or {}
+
     print(f"DataX start: {db}, tables={len(tables)}")
     if skipped_by_rule > 0:
         print(f"DataX skip-by-rule: {skipped_by_rule} tables")
@@ -1406,30 +1509,37 @@ def run_datax_for_db(db: str, config: Dict, workspace: str, selected_tables: Opt
     output_lock = threading.Lock()
 
     def run_one_table(idx: int, table: str) -> tuple[int, str, List[str], str]:
-        column_defs = get_mysql_column_defs(
-            str(mysql_conn.get("container", "")),
-            str(mysql_conn.get("user", "")),
-            str(mysql_conn.get("password", "")),
-            db,
-            table,
-            host=str(mysql_conn.get("host", "")),
-            port=int(mysql_conn.get("port", 0) or 0),
-        )
+        table_meta = schema_bundle.get(table)
+        if table_meta is not None:
+            column_defs = table_meta["column_defs"]
+        else:
+            column_defs = get_mysql_column_defs(
+                str(mysql_conn.get("container", "")),
+                str(mysql_conn.get("user", "")),
+                str(mysql_conn.get("password", "")),
+                db,
+                table,
+                host=str(mysql_conn.get("host", "")),
+                port=int(mysql_conn.get("port", 0) or 0),
+            )
         columns = [column["name"] for column in column_defs]
         if not columns:
             with output_lock:
                 print(f"DataX skipped table: {db}.{table} (no columns)")
             return 0, table, [], ""
 
-        split_pk = get_mysql_split_pk(
-            str(mysql_conn.get("container", "")),
-            str(mysql_conn.get("user", "")),
-            str(mysql_conn.get("password", "")),
-            db,
-            table,
-            host=str(mysql_conn.get("host", "")),
-            port=int(mysql_conn.get("port", 0) or 0),
-        )
+        if table_meta is not None:
+            split_pk = table_meta["split_pk"]
+        else:
+            split_pk = get_mysql_split_pk(
+                str(mysql_conn.get("container", "")),
+                str(mysql_conn.get("user", "")),
+                str(mysql_conn.get("password", "")),
+                db,
+                table,
+                host=str(mysql_conn.get("host", "")),
+                port=int(mysql_conn.get("port", 0) or 0),
+            )
 
         channel = int(datax_cfg.get("channel", 2))
         batch_size = int(datax_cfg.get("batch_size", 2000))
@@ -1458,35 +1568,32 @@ def run_datax_for_db(db: str, config: Dict, workspace: str, selected_tables: Opt
             cmd_env[str(key)] = str(value)
 
         tail = deque(maxlen=200)
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            cwd=workspace,
-            env=cmd_env,
-            encoding="utf-8",
-            errors="replace",
-        )
+        shown: List[str] = []
+
+        def on_line(line: str) -> None:
+            if show_output and (not compact_log or is_datax_key_log(line)):
+                shown.append(line)
+
+        def flush_shown(lines: List[str]) -> None:
+            # deque.extend keeps the last 200 lines at a few ns per line
+            tail.extend(lines)
+            # One locked write per chunk instead of one per line across table threads
+            if shown:
+                with output_lock:
+                    sys.stdout.write("".join(shown))
+                shown.clear()
+
         try:
-            assert process.stdout is not None
-            for line in process.stdout:
-                tail.append(line)
-                if show_output:
-                    if compact_log:
-                        if is_datax_key_log(line):
-                            with output_lock:
-                                sys.stdout.write(line)
-                    else:
-                        with output_lock:
-                            sys.stdout.write(line)
-            code = process.wait()
+            code = stream_command(cmd, on_line, cwd=workspace, env=cmd_env, chunk_cb=flush_shown)
         finally:
             if cleanup_on_finish:
                 cleanup_datax_job_file(job_file)
         return code, table, list(tail), job_file
 
     first_error: tuple[int, str, List[str], str] | None = None
+    # concurrent.futures pulls in logging; keep it off the --help and pgloader-only paths
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
     with ThreadPoolExecutor(max_workers=table_parallelism) as executor:
         futures = {
             executor.submit(run_one_table, idx, table): (idx, table)
@@ -1533,6 +1640,12 @@ def print_progress(db: str, processed: int, total: int) -> None:
     sys.stdout.flush()
 
 
+@functools.lru_cache(maxsize=128)
+def _table_line_re(db: str) -> re.Pattern:
+    # Summary rows look like "<db>.<table>  <errors>  <rows> ..."
+    return re.compile(rf"^\s*{re.escape(db)}\.\S+\s+\d+\s+\d+", re.ASCII)
+
+
 def run_pgloader_for_db(
     db: str,
     config: Dict,
@@ -1617,32 +1730,36 @@ def run_pgloader_for_db(
     show_output = bool(pgloader_cfg.get("show_output", False))
     processed = 0
     tail = deque(maxlen=200)
-    table_line = re.compile(rf"^\s*{re.escape(db)}\.\S+\s+\d+\s+\d+")
+    table_line = _table_line_re(db)
+    # Every summary row contains "<db>."; a substring test rejects other lines before the regex
+    table_prefix = f"{db}."
     has_log_error = False
 
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        cwd=workspace,
-        encoding="utf-8",
-        errors="replace",
-    )
+    shown: List[str] = []
+
+    def flush_shown() -> None:
+        if shown:
+            sys.stdout.write("".join(shown))
+            shown.clear()
+
+    def on_chunk(lines: List[str]) -> None:
+        tail.extend(lines)
+        flush_shown()
+
+    def on_line(line: str) -> None:
+        nonlocal has_log_error, processed
+        if show_output:
+            shown.append(line)
+        if is_pgloader_error_log(line):
+            has_log_error = True
+        if table_prefix in line and table_line.match(line):
+            processed += 1
+            # Keep the progress line after the output that led to it
+            flush_shown()
+            print_progress(db, processed, total_tables)
 
     try:
-        assert process.stdout is not None
-        for line in process.stdout:
-            tail.append(line)
-            if show_output:
-                sys.stdout.write(line)
-            if is_pgloader_error_log(line):
-                has_log_error = True
-            if table_line.match(line):
-                processed += 1
-                print_progress(db, processed, total_tables)
-
-        code = process.wait()
+        code = stream_command(cmd, on_line, cwd=workspace, chunk_cb=on_chunk)
     finally:
         if cleanup_pgloader_temp:
             cleanup_pgloader_rendered_file(rendered_path)